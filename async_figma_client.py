@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import pathlib
+
+from logger_setup import setup_logger
+from async_http import httpx, make_async_client, HostLimiter
+
+logger = setup_logger(__name__)
+
+class AsyncFigmaClient:
+    """asyncio counterpart of FigmaClient: same methods, pooled connections and a per-host concurrency limit."""
+    BASE_URL = "https://api.figma.com/v1"
+
+    def __init__(self, token: str, max_connections: int = 100, per_host_limit: int = 20):
+        self.client = make_async_client({"X-Figma-Token": token}, max_connections)
+        # Image URLs point to S3 or other external hosts, so they get a client without the Figma token
+        self.download_client = make_async_client(None, max_connections)
+        self.limit = HostLimiter(per_host_limit)
+        self.bytes_downloaded = 0 # Image bytes streamed to disk by download_image_to_file
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+        await self.download_client.aclose()
+
+    async def get(self, endpoint: str, **params) -> dict:
+        url = f"{self.BASE_URL}/{endpoint}"
+        try:
+            async with self.limit(url):
+                response = await self.client.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Figma API request failed: {e}")
+            raise
+
+    async def get_file_tree(self, file_key: str, depth: int | None = None) -> dict:
+        if depth is None:
+            return await self.get(f"files/{file_key}")
+        return await self.get(f"files/{file_key}", depth=depth)
+
+    async def get_file_version(self, file_key: str) -> str | None:
+        return (await self.get(f"files/{file_key}", depth=1)).get("version")
+
+    async def get_nodes(self, file_key: str, ids: str) -> dict:
+        return await self.get(f"files/{file_key}/nodes", ids=ids)
+
+    async def get_image_urls(self, file_key: str, node_ids: list[str], scale: float | int) -> dict[str, str | None]:
+        data = await self.get(f"images/{file_key}", ids=",".join(node_ids), format="png", scale=scale)
+        images = data.get("images") or {}
+        return {node_id: images.get(node_id) for node_id in node_ids}
+
+    async def get_image_url(self, file_key: str, node_id: str, scale: float | int) -> str | None:
+        try:
+            return (await self.get_image_urls(file_key, [node_id], scale))[node_id]
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.warning(f"Image not found for node {node_id} in file {file_key}: {e}")
+                return None
+            raise
+
+    async def download_image_data(self, image_url: str) -> bytes:
+        try:
+            async with self.limit(image_url):
+                response = await self.download_client.get(image_url)
+            response.raise_for_status()
+            return response.content
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to download image from {image_url}: {e}")
+            raise
+
+    async def download_image_to_file(self, image_url: str, path: pathlib.Path, chunk_size: int = 64 * 1024) -> tuple[int, str]:
+        """
+        Streams the image to path in chunks, hashing it on the way. Returns (bytes written, sha256 hex).
+        File operations run in worker threads so a slow disk does not stall the event loop.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        part_path = path.with_name(path.name + ".part")
+        try:
+            async with self.limit(image_url):
+                async with self.download_client.stream("GET", image_url) as response:
+                    response.raise_for_status()
+                    fh = await asyncio.to_thread(part_path.open, "wb")
+                    try:
+                        async for chunk in response.aiter_bytes(chunk_size):
+                            await asyncio.to_thread(fh.write, chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+                    finally:
+                        await asyncio.to_thread(fh.close)
+            await asyncio.to_thread(part_path.replace, path)
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to download image from {image_url}: {e}")
+            await asyncio.to_thread(part_path.unlink, missing_ok=True)
+            raise
+        except OSError:
+            await asyncio.to_thread(part_path.unlink, missing_ok=True)
+            raise
+        self.bytes_downloaded += size
+        return size, digest.hexdigest()
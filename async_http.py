@@ -0,0 +1,42 @@
+import asyncio
+
+try:
+    import httpx
+except ImportError:  # httpx необязателен: без него асинхронный режим недоступен
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (HTTP/2 в httpx включается только при установленном h2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def async_available() -> bool:
+    return httpx is not None
+
+
+def make_async_client(headers: dict | None = None, max_connections: int = 100,
+                      max_keepalive_connections: int = 20, timeout: float = 60) -> "httpx.AsyncClient":
+    """Пул соединений httpx; HTTP/2 используется, если установлен пакет h2."""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        headers=headers,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+        timeout=timeout,
+        follow_redirects=True,
+    )
+
+
+class HostLimiter:
+    """Ограничивает число одновременных запросов к одному хосту (отдельный семафор на хост)."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
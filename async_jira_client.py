@@ -0,0 +1,81 @@
+import asyncio
+import base64
+import pathlib
+
+from logger_setup import setup_logger
+from async_http import httpx, make_async_client, HostLimiter
+from jira_client import build_issue_fields
+from multipart_stream import MultipartFileStream
+
+logger = setup_logger(__name__)
+
+class AsyncJiraClient:
+    """asyncio counterpart of JiraClient: same methods, pooled connections and a per-host concurrency limit."""
+
+    def __init__(self, base_url: str, username: str, password: str,
+                 max_connections: int = 100, per_host_limit: int = 20):
+        self.base_url = base_url.rstrip('/')
+        auth_token = base64.b64encode(f"{username}:{password}".encode()).decode()
+        self.client = make_async_client({"Authorization": f"Basic {auth_token}"}, max_connections)
+        self.limit = HostLimiter(per_host_limit)
+        self.bytes_uploaded = 0 # Attachment request body bytes sent by attach_files
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _request(self, method: str, endpoint: str, json_data: dict | None = None,
+                       data: MultipartFileStream | None = None) -> "httpx.Response":
+        url = f"{self.base_url}{endpoint}"
+        headers = {} # Per-request headers
+        content = None
+        if data is not None:
+            headers["X-Atlassian-Token"] = "no-check"
+            headers["Content-Type"] = data.content_type
+            headers["Content-Length"] = str(len(data))
+            content = _aiter(data.chunks())
+
+        try:
+            async with self.limit(url):
+                response = await self.client.request(method, url, json=json_data, content=content, headers=headers)
+            response.raise_for_status()
+            return response
+        except httpx.HTTPError as e:
+            logger.error(f"Jira API request {method} {url} failed: {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                logger.error(f"Jira response: {e.response.status_code} - {e.response.text}")
+            raise
+
+    async def create_issue(self, project_key: str, summary: str, description: str,
+                           issue_type: str, xray_steps_field: str, steps_data: list, labels: list[str],
+                           custom_field_test_repository_path_id: str | None = None,
+                           test_repository_path_value: str | None = None,
+                           custom_field_test_case_type_id: str | None = None,
+                           test_case_type_value: str | None = None) -> dict:
+        fields = build_issue_fields(
+            project_key, summary, description, issue_type, xray_steps_field, steps_data, labels,
+            custom_field_test_repository_path_id, test_repository_path_value,
+            custom_field_test_case_type_id, test_case_type_value
+        )
+        response = await self._request("POST", "/rest/api/2/issue", json_data={"fields": fields})
+        return response.json()
+
+    async def attach_files(self, issue_key: str, file_paths: list[pathlib.Path], content_type: str = "image/png") -> None:
+        """Uploads all files to the issue in one multipart request, streaming them from disk."""
+        body = await asyncio.to_thread(MultipartFileStream, [(path.name, path, content_type) for path in file_paths])
+        await self._request("POST", f"/rest/api/2/issue/{issue_key}/attachments", data=body)
+        self.bytes_uploaded += len(body)
+
+    async def attach_file(self, issue_key: str, file_path: pathlib.Path) -> None:
+        await self.attach_files(issue_key, [file_path])
+
+
+async def _aiter(chunks):
+    """Async view of a sync chunk iterator: each next() (file open/read) runs in a worker thread."""
+    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+        yield chunk
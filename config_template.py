@@ -8,11 +8,33 @@ ISSUE_TYPE = "Test"
 XRAY_STEPS_FIELD = "customfield_10204"
 CUSTOMFIELD_TEST_REPOSITORY_PATH = "customfield_10211"
 CUSTOMFIELD_TEST_CASE_TYPE = "customfield_12501"
+# Предварительная проверка: перед созданием задач все поля проверяются по метаданным создания задачи
+# (createmeta) проекта и типа задачи — обязательные поля, ID пользовательских полей, допустимые значения
+# testCaseType, метки без пробелов. При ошибках ни одна задача не создается. Метаданные кэшируются на диске.
+JIRA_PREFLIGHT_ENABLED = True
+JIRA_CREATEMETA_CACHE_PATH = "create_final_tests/artifacts/.cache/jira_createmeta.json"
+JIRA_CREATEMETA_CACHE_TTL = 24 * 60 * 60  # Время жизни кэша createmeta в секундах
+# Итоги прогона: манифест (ключи созданных задач, идентификаторы источников, время создания) и ссылка
+# на результат по метке прогона runid_<RUN_ID> — ее длина не зависит от числа задач.
+RESULT_MANIFEST_DIR = "run_manifests"
+# True — дополнительно строить ссылки "issuekey in (...)", разбитые на части по RESULT_KEYS_PER_LINK ключей.
+RESULT_KEY_LINKS = False
+RESULT_KEYS_PER_LINK = 100
 
 # Настройки Figma
 FIGMA_TOKEN = "YOUR_FIGMA_PERSONAL_ACCESS_TOKEN"
 FIGMA_FILE_URL = "YOUR_FIGMA_FILE_URL"  # Пример: "https://www.figma.com/file/your-file-id/file-name"
 FIGMA_SCALE = 1  # Отрегулируйте по мере необходимости, обычно 1 или 2 для retina
+# Бюджет пикселей на один PNG: масштаб выбирается для каждого узла по его absoluteBoundingBox,
+# чтобы width*height*scale² не превышало FIGMA_MAX_PIXELS. None — всегда FIGMA_SCALE.
+FIGMA_MAX_PIXELS = None  # Пример: 4_000_000
+FIGMA_MIN_SCALE = 0.5  # Нижняя граница масштаба для больших экранов
+FIGMA_MAX_SCALE = 2  # Верхняя граница масштаба для мелких элементов
+FIGMA_RENDER_BATCH_SIZE = 50  # Сколько узлов с одинаковым масштабом рендерить одним запросом
+# Глубина загрузки дерева файла для выбора фреймов (None — весь документ). Полные поддеревья
+# выбранных фреймов затем загружаются пакетными запросами nodes по FIGMA_NODES_BATCH_SIZE id.
+FIGMA_TREE_DEPTH = 3  # 1 — только страницы, 2 — фреймы верхнего уровня, 3 — фреймы внутри секций
+FIGMA_NODES_BATCH_SIZE = 20
 
 # Фильтры фреймов (для _collect_top_frames)
 # Эти настройки помогают фильтровать, какие фреймы из Figma обрабатываются.
@@ -26,6 +48,13 @@ FRAME_INCLUDE = ("screen",)  # Включать только фреймы, им
 ELEMENT_BANNED  = ("icon", "decoration")  # Имена элементов, которые нужно игнорировать (поиск по подстроке, без учета регистра)
 ELEMENT_INCLUDE = ("section",) # Включать только элементы, имена которых содержат эти строки (поиск по подстроке, без учета регистра)
 
+# Дедупликация визуально одинаковых элементов (нужен Pillow)
+# Рендеры элементов сравниваются по перцептивному хэшу (64 бита); элементы с отличием не более чем в
+# ELEMENT_DEDUP_THRESHOLD бит объединяются в один тест со ссылками на все узлы Figma и одним PNG.
+# Почти однотонные рендеры объединяются только при точном совпадении пикселей.
+ELEMENT_DEDUP_ENABLED = False
+ELEMENT_DEDUP_THRESHOLD = 5
+
 # Режим работы
 OPERATIONAL_MODE = "FILE_EXPORT"  # "JIRA_EXPORT" или "FILE_EXPORT"
 
@@ -43,4 +72,49 @@ TEXT_EXPORT_DEFAULT_PRIORITY = "Normal"
 # Доска/категория по умолчанию для тест-кейсов в TXT-файле.
 TEXT_EXPORT_DEFAULT_BOARD = "QA"
 # Разделитель для TXT/CSV-файла.
-TEXT_EXPORT_CSV_DELIMITER = ";"
\ No newline at end of file
+TEXT_EXPORT_CSV_DELIMITER = ";"
+# Формат выгрузки: "csv" (текущий формат, TXT с разделителем выше), "jsonl" (JSON-объект на строку)
+# или "xray_json" (JSON для импорта тестов в Xray). Для jsonl/xray_json расширение файла меняется на .jsonl/.json.
+TEXT_EXPORT_FORMAT = "csv"
+# Строки пишутся в файл <имя>.part по мере обработки и сбрасываются на диск каждые N строк;
+# по завершении файл атомарно переименовывается. После сбоя уже записанные строки остаются в .part.
+TEXT_EXPORT_FLUSH_EVERY = 50
+# Кэш хэшей входов: TXT-файл и итоговый промт не перезаписываются, если тест-кейсы не изменились.
+# Для принудительной перезаписи запустите скрипт с флагом --force.
+BUILD_CACHE_PATH = "create_final_tests/artifacts/.cache/build_cache.json"
+
+# --- Асинхронный режим (нужен httpx; HTTP/2 — при установленном h2) ---
+# Рендер, скачивание PNG и создание задач Jira выполняются конкурентно в одном потоке.
+# С кассетами (HTTP_CASSETTE_MODE) не совместим — в этом случае используются обычные клиенты.
+ASYNC_MODE = False
+ASYNC_MAX_CONNECTIONS = 100  # Размер пула соединений
+ASYNC_PER_HOST_LIMIT = 20  # Максимум одновременных запросов к одному хосту
+
+# --- Конвейерный режим (потоки, обычные клиенты) ---
+# Каждый экран проходит стадии discover (узлы и элементы) -> render (URL картинок) -> download (PNG)
+# -> export (строки выгрузки или задачи Jira), связанные ограниченными очередями: пока загружаются
+# задачи одного экрана, следующий уже рендерится. При ASYNC_MODE = True используется асинхронный режим.
+PIPELINE_ENABLED = False
+PIPELINE_WORKERS = {"discover": 2, "render": 2, "download": 4, "export": 2}  # Потоков на стадию
+PIPELINE_QUEUE_SIZE = 4  # Сколько экранов может ждать между двумя стадиями
+# True — тест-кейсы и ссылки в порядке экранов; False — по мере готовности экранов
+# (порядок строк между прогонами может меняться, и BUILD_CACHE_PATH будет считать выгрузку изменившейся).
+PIPELINE_ORDERED = True
+
+# --- Запись/воспроизведение HTTP (кассеты) ---
+# "record" — сохранять все ответы Figma и Jira (включая PNG) в кассету,
+# "replay" — отдавать ответы из кассеты без сети (для бенчмарков и профилирования), None — выключено.
+HTTP_CASSETTE_MODE = None
+HTTP_CASSETTE_PATH = "cassettes/run.cassette"
+# Задержка ответов при воспроизведении: None — без задержки, число — секунды, "recorded" — как при записи.
+HTTP_CASSETTE_LATENCY = None
+
+# --- Сервис отслеживания изменений (figma_watch_service.py) ---
+WATCH_FILE_URLS = []  # Файлы Figma для отслеживания; пустой список — только FIGMA_FILE_URL
+WATCH_POLL_INTERVAL = 60  # Секунды между проверками версии файла; 0 — только вебхук
+WATCH_DEBOUNCE_SECONDS = 30  # Генерация запускается после стольких секунд без новых изменений
+WATCH_QUEUE_SIZE = 10  # Максимум заданий в очереди
+WATCH_HTTP_HOST = "127.0.0.1"
+WATCH_HTTP_PORT = 8787  # POST /webhook и GET /status; None — без HTTP-сервера
+WATCH_WEBHOOK_PASSCODE = ""  # passcode из настроек вебхука Figma; пустая строка — без проверки
+WATCH_STATE_PATH = "create_final_tests/artifacts/.cache/figma_watch_versions.json"  # Уже обработанные версии файлов
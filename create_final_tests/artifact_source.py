@@ -0,0 +1,201 @@
+import codecs
+import mmap
+import os
+import re
+from typing import BinaryIO, Iterator
+
+# Заголовки markdown (ATX) и ограничители блоков кода: заголовки внутри ``` не считаются секциями
+_HEADING_OR_FENCE = re.compile(rb"^(?:(```|~~~)|(#{1,6})[ \t]+([^\r\n]*))", re.MULTILINE)
+_ANCHOR = re.compile(r"\{#([^}]*)\}")
+
+
+def _section_name(title: str) -> str:
+    """Имя секции для сравнения: без разметки (**, \\_, {#anchor}, хвостовые #) и в нижнем регистре."""
+    return _ANCHOR.sub("", title).replace("\\", "").replace("*", "").strip().rstrip("#").strip().lower()
+
+
+def _heading_keys(raw_title: bytes) -> set[str]:
+    """Варианты имени секции: заголовок без разметки и якорь."""
+    title = raw_title.decode("utf-8", errors="replace")
+    keys = {anchor.strip().lower() for anchor in _ANCHOR.findall(title)}
+    keys.add(_section_name(title))
+    return keys
+
+
+def _parse_line_range(spec) -> tuple[int, int | None]:
+    """'10-40', '10-', '-40' или '7' (нумерация с 1, концы включаются) -> (первая строка, последняя или None)."""
+    text = str(spec).strip()
+    first, sep, last = text.partition("-")
+    try:
+        start = int(first) if first.strip() else 1
+        end = (int(last) if last.strip() else None) if sep else start
+    except ValueError:
+        raise ValueError(f"Некорректный диапазон строк '{spec}'. Ожидается 'N', 'N-M', 'N-' или '-M'.") from None
+    if start < 1 or (end is not None and end < start):
+        raise ValueError(f"Некорректный диапазон строк '{spec}'.")
+    return start, end
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class MappedArtifact(os.PathLike):
+    """
+    Артефакт, открытый через mmap: файл не читается в строку, а выбранные байтовые диапазоны
+    копируются в двоичный поток срезами memoryview без копирования и декодирования.
+    lines — диапазоны строк ('10-40'), sections — заголовки markdown (текст без разметки или якорь
+    {#id}); секция длится до следующего заголовка того же или более высокого уровня.
+    Без lines и sections выбирается весь файл. Диапазоны выводятся в порядке следования в файле.
+    Как и некорректный диапазон строк, секция без подходящего заголовка в файле — ValueError.
+    """
+
+    def __init__(self, path: str | os.PathLike, lines=None, sections=None):
+        self.path = os.fspath(path)
+        self.lines = [_parse_line_range(spec) for spec in _as_list(lines)]
+        self.sections = [_section_name(str(name)) for name in _as_list(sections)]
+        if self.sections:
+            self._check_sections([str(name) for name in _as_list(sections)])
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"MappedArtifact({self.path!r}, lines={self.lines}, sections={self.sections})"
+
+    @property
+    def is_partial(self) -> bool:
+        return bool(self.lines or self.sections)
+
+    def _open(self) -> mmap.mmap | None:
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None  # Пустой файл нельзя отобразить в память
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _ranges(self, mapped: mmap.mmap) -> list[tuple[int, int]]:
+        if not self.is_partial:
+            return [(0, len(mapped))]
+        ranges = [self._line_span(mapped, start, end) for start, end in self.lines]
+        ranges += self._section_spans(mapped)
+        merged: list[tuple[int, int]] = []
+        for start, end in sorted(span for span in ranges if span[0] < span[1]):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @staticmethod
+    def _line_span(mapped: mmap.mmap, first: int, last: int | None) -> tuple[int, int]:
+        size = len(mapped)
+        pos = 0
+        for _ in range(first - 1):
+            newline = mapped.find(b"\n", pos)
+            if newline < 0:
+                return size, size
+            pos = newline + 1
+        if last is None:
+            return pos, size
+        end = pos
+        for _ in range(last - first + 1):
+            newline = mapped.find(b"\n", end)
+            if newline < 0:
+                return pos, size
+            end = newline + 1
+        return pos, end
+
+    def _check_sections(self, names: list[str]) -> None:
+        mapped = self._open()
+        try:
+            found = set().union(*(keys for _, _, keys in self._headings(mapped))) if mapped is not None else set()
+        finally:
+            if mapped is not None:
+                mapped.close()
+        missing = [name for name, key in zip(names, self.sections) if key not in found]
+        if missing:
+            listed = ", ".join(f"'{name}'" for name in missing)
+            raise ValueError(f"В файле '{self.path}' нет заголовков секций: {listed}.")
+
+    @staticmethod
+    def _headings(mapped: mmap.mmap) -> list[tuple[int, int, set[str]]]:
+        """Заголовки markdown вне блоков кода: (смещение, уровень, варианты имени)."""
+        headings = []
+        in_fence = False
+        for match in _HEADING_OR_FENCE.finditer(mapped):
+            if match.group(1):
+                in_fence = not in_fence
+            elif not in_fence:
+                headings.append((match.start(), len(match.group(2)), _heading_keys(match.group(3))))
+        return headings
+
+    def _section_spans(self, mapped: mmap.mmap) -> list[tuple[int, int]]:
+        if not self.sections:
+            return []
+        headings = self._headings(mapped)
+        wanted = set(self.sections)
+        spans = []
+        for index, (offset, level, keys) in enumerate(headings):
+            if not keys & wanted:
+                continue
+            end = next((other_offset for other_offset, other_level, _ in headings[index + 1:] if other_level <= level), len(mapped))
+            spans.append((offset, end))
+        return spans
+
+    def write_to(self, out: BinaryIO) -> int:
+        """Копирует выбранные диапазоны в двоичный поток out. Возвращает число записанных байт."""
+        mapped = self._open()
+        if mapped is None:
+            return 0
+        written = 0
+        try:
+            with memoryview(mapped) as view:
+                for start, end in self._ranges(mapped):
+                    with view[start:end] as chunk:
+                        out.write(chunk)
+                    written += end - start
+        finally:
+            mapped.close()
+        return written
+
+    def iter_text(self, chunk_size: int = 1024 * 1024) -> Iterator[str]:
+        """Текст выбранных диапазонов блоками (UTF-8), без загрузки файла целиком."""
+        mapped = self._open()
+        if mapped is None:
+            return
+        try:
+            for start, end in self._ranges(mapped):
+                decoder = codecs.getincrementaldecoder("utf-8")()
+                for pos in range(start, end, chunk_size):
+                    if text := decoder.decode(mapped[pos:min(pos + chunk_size, end)]):
+                        yield text
+                if text := decoder.decode(b"", final=True):
+                    yield text
+        finally:
+            mapped.close()
+
+    def iter_lines(self) -> Iterator[str]:
+        """Строки выбранных диапазонов с переводами строк — для построчных трансформаций."""
+        pending = ""
+        for text in self.iter_text():
+            *lines, pending = (pending + text).split("\n")
+            for line in lines:
+                yield line + "\n"
+        if pending:
+            yield pending
+
+    def read_text(self) -> str:
+        """Выбранный текст целиком, без BOM — для разбора (CSV, заголовки markdown)."""
+        return "".join(self.iter_text()).removeprefix("\ufeff")
+
+    def size(self) -> int:
+        """Размер выбранных диапазонов в байтах."""
+        mapped = self._open()
+        if mapped is None:
+            return 0
+        try:
+            return sum(end - start for start, end in self._ranges(mapped))
+        finally:
+            mapped.close()
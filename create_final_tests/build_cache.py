@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+
+# Меняется при изменении формата вывода, чтобы старые записи кэша не считались актуальными
+CACHE_VERSION = 1
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str | os.PathLike) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_source(source) -> str:
+    """Хэш источника: пути к файлу (os.PathLike) или содержимого строкой."""
+    if isinstance(source, os.PathLike):
+        return sha256_file(source)
+    return sha256_bytes(source.encode("utf-8"))
+
+
+class BuildCache:
+    """
+    Кэш сборки: для каждого выходного файла хранит хэши входов, из которых он был собран,
+    и хэш самого файла. Если входы не изменились и файл никто не трогал, пересборка
+    пропускается и файл не перезаписывается.
+    """
+
+    def __init__(self, cache_path: str | os.PathLike):
+        self.cache_path = os.fspath(cache_path)
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    @staticmethod
+    def _key(output_path: str | os.PathLike) -> str:
+        return os.path.abspath(output_path)
+
+    def is_fresh(self, output_path: str | os.PathLike, inputs: dict[str, str]) -> bool:
+        entry = self.entries.get(self._key(output_path))
+        if not entry or entry.get("version") != CACHE_VERSION or entry.get("inputs") != inputs:
+            return False
+        if not os.path.isfile(output_path):
+            return False
+        return sha256_file(output_path) == entry.get("output_sha256")
+
+    def record(self, output_path: str | os.PathLike, inputs: dict[str, str]) -> None:
+        self.entries[self._key(output_path)] = {
+            "version": CACHE_VERSION,
+            "inputs": inputs,
+            "output_sha256": sha256_file(output_path),
+        }
+        self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cache_path)
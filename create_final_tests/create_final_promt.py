@@ -1,68 +1,439 @@
+import argparse
+import io
 import json
 import os
+import pathlib
+from typing import Iterator, TextIO
 
-def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(script_dir, 'config_artifacts.json')
-    
+try:
+    from .artifact_source import MappedArtifact
+    from .build_cache import BuildCache, sha256_file, sha256_source
+    from .prompt_shards import (ShardingError, estimate_tokens, iter_test_rows, merge_shard_outputs, plan_shards,
+                                read_test_rows, remove_stale_shard_files, rows_to_csv, test_names, write_manifest)
+    from .prompt_template import PromptTemplate, resolve_transforms
+    from . import swagger_index
+except ImportError:  # Запуск как скрипта из create_final_tests/
+    from artifact_source import MappedArtifact
+    from build_cache import BuildCache, sha256_file, sha256_source
+    from prompt_shards import (ShardingError, estimate_tokens, iter_test_rows, merge_shard_outputs, plan_shards,
+                               read_test_rows, remove_stale_shard_files, rows_to_csv, test_names, write_manifest)
+    from prompt_template import PromptTemplate, resolve_transforms
+    import swagger_index
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG_PATH = os.path.join(SCRIPT_DIR, 'config_artifacts.json')
+
+# Ключ артефакта с тестами из Figma в config_artifacts.json
+TESTS_FROM_FIGMA_ARTIFACT = 'tests_from_figma'
+
+# Кэш хэшей входов, по которому пропускается пересборка неизменившихся промтов
+DEFAULT_BUILD_CACHE_PATH = './artifacts/.cache/build_cache.json'
+
+# Значения по умолчанию для секции "sharding" в config_artifacts.json
+DEFAULT_SHARDING = {
+    'token_budget': 32000,
+    'output_dir': './artifacts/shards',
+    'manifest_name': 'manifest.json',
+    'merged_output_path': './artifacts/final_tests.txt',
+}
+
+# Значения по умолчанию для секции "swagger_filter": без секции спецификация вставляется целиком
+DEFAULT_SWAGGER_FILTER = {
+    'enabled': False,
+    'artifact': 'swagger',
+    'requirements_artifact': 'req_showcase',
+    'cache_dir': './artifacts/.cache',
+}
+# Сколько исключенных фильтром операций перечислять в выводе
+MAX_DROPPED_OPERATIONS_SHOWN = 20
+
+
+class PromptBuildError(Exception):
+    """Ошибка сборки промта. Текст исключения готов для вывода пользователю."""
+
+
+def _resolve_path(path: str, base_dir: str) -> str:
+    """Относительные пути в конфигурации считаются от директории конфигурационного файла."""
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(base_dir, path))
+
+
+def _resolve_artifact(spec: str | dict, base_dir: str) -> str | dict:
+    """Артефакт задается путем или словарем {"path": ..., "lines": [...], "sections": [...]}."""
+    if isinstance(spec, dict):
+        return {**spec, 'path': _resolve_path(spec.get('path', ''), base_dir)}
+    return _resolve_path(spec, base_dir)
+
+
+def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> dict:
+    """Читает config_artifacts.json и приводит пути в нём к абсолютным."""
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
             config = json.load(f)
     except FileNotFoundError:
-        print(f"❌ Ошибка: Конфигурационный файл '{config_path}' не найден.")
-        return
+        raise PromptBuildError(f"❌ Ошибка: Конфигурационный файл '{config_path}' не найден.")
     except json.JSONDecodeError:
-        print(f"❌ Ошибка: Некорректный формат JSON в файле '{config_path}'.")
-        return
+        raise PromptBuildError(f"❌ Ошибка: Некорректный формат JSON в файле '{config_path}'.")
     except Exception as e:
-        print(f"❌ Ошибка при чтении конфигурационного файла '{config_path}': {e}")
-        return
+        raise PromptBuildError(f"❌ Ошибка при чтении конфигурационного файла '{config_path}': {e}")
 
-    prompt_template_path = config.get('prompt_template_path')
-    output_prompt_path = config.get('output_prompt_path')
-    artifacts_paths = config.get('artifacts', {})
-    placeholders = config.get('placeholders', {})
+    if not config.get('prompt_template_path'):
+        raise PromptBuildError("❌ Ошибка: 'prompt_template_path' не указан в конфигурации.")
+    if not config.get('output_prompt_path'):
+        raise PromptBuildError("❌ Ошибка: 'output_prompt_path' не указан в конфигурации.")
+
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    config['prompt_template_path'] = _resolve_path(config['prompt_template_path'], base_dir)
+    config['output_prompt_path'] = _resolve_path(config['output_prompt_path'], base_dir)
+    config['build_cache_path'] = _resolve_path(config.get('build_cache_path', DEFAULT_BUILD_CACHE_PATH), base_dir)
+    config['artifacts'] = {
+        key: _resolve_artifact(spec, base_dir) for key, spec in config.get('artifacts', {}).items()
+    }
+    config.setdefault('placeholders', {})
+    config.setdefault('transforms', {})
+    config['sharding'] = {**DEFAULT_SHARDING, **config.get('sharding', {})}
+    for key in ('output_dir', 'merged_output_path'):
+        config['sharding'][key] = _resolve_path(config['sharding'][key], base_dir)
+    config['swagger_filter'] = {**DEFAULT_SWAGGER_FILTER, **config.get('swagger_filter', {})}
+    config['swagger_filter']['cache_dir'] = _resolve_path(config['swagger_filter']['cache_dir'], base_dir)
+    return config
 
-    if not prompt_template_path:
-        print("❌ Ошибка: 'prompt_template_path' не указан в конфигурации.")
-        return
-    if not output_prompt_path:
-        print("❌ Ошибка: 'output_prompt_path' не указан в конфигурации.")
-        return
 
+def _load_template(config: dict) -> PromptTemplate:
+    prompt_template_path = config['prompt_template_path']
     try:
-        with open(prompt_template_path, 'r', encoding='utf-8') as f:
-            prompt_content = f.read()
+        return PromptTemplate.from_file(prompt_template_path, config['placeholders'])
     except FileNotFoundError:
-        print(f"❌ Ошибка: Файл шаблона '{prompt_template_path}' не найден.")
+        raise PromptBuildError(f"❌ Ошибка: Файл шаблона '{prompt_template_path}' не найден.")
+    except Exception as e:
+        raise PromptBuildError(f"❌ Ошибка при чтении файла шаблона '{prompt_template_path}': {e}")
+
+
+def _load_transforms(config: dict) -> dict:
+    try:
+        return {key: resolve_transforms(names) for key, names in config['transforms'].items()}
+    except ValueError as e:
+        raise PromptBuildError(f"❌ Ошибка в секции 'transforms' конфигурации: {e}")
+
+
+def _warn_missing_placeholders(template: PromptTemplate, artifact_keys) -> None:
+    for artifact_key in artifact_keys:
+        if artifact_key not in template.placeholders:
+            print(f"⚠️ Предупреждение: Плейсхолдер для артефакта '{artifact_key}' не найден в конфигурации. Пропуск.")
+
+
+def build_prompt(template: str | TextIO, artifacts: dict[str, str | TextIO],
+                 placeholders: dict[str, str]) -> str:
+    """Подставляет содержимое артефактов (строки или потоки) в шаблон промта."""
+    template_text = template if isinstance(template, str) else template.read()
+    prompt_template = PromptTemplate(template_text, placeholders)
+    _warn_missing_placeholders(prompt_template, artifacts)
+    out = io.StringIO()
+    prompt_template.render(out, artifacts)
+    return out.getvalue()
+
+
+def _collect_sources(config: dict, overrides: dict[str, str | TextIO]) -> dict:
+    """
+    Источники артефактов: содержимое из overrides или пути к файлам из конфигурации.
+    Артефакт с lines или sections становится MappedArtifact: в промт попадают только выбранные части файла.
+    """
+    sources: dict = {}
+    for artifact_key, spec in config['artifacts'].items():
+        artifact_path = spec['path'] if isinstance(spec, dict) else spec
+        if artifact_key in overrides:
+            sources[artifact_key] = overrides[artifact_key]
+        elif not os.path.isfile(artifact_path):
+            raise PromptBuildError(f"❌ Ошибка: Файл артефакта '{artifact_path}' (для ключа '{artifact_key}') не найден. Выполнение прервано.")
+        elif isinstance(spec, dict) and (spec.get('lines') or spec.get('sections')):
+            try:
+                sources[artifact_key] = MappedArtifact(artifact_path, spec.get('lines'), spec.get('sections'))
+            except ValueError as e:
+                raise PromptBuildError(f"❌ Ошибка в описании артефакта '{artifact_key}': {e}")
+        else:
+            sources[artifact_key] = pathlib.Path(artifact_path)
+    return sources
+
+
+def _materialize_streams(sources: dict) -> dict:
+    """Потоки читаются в строки: их содержимое нужно для хэша и может понадобиться несколько раз."""
+    return {
+        key: src if isinstance(src, (str, pathlib.Path, MappedArtifact)) else src.read()
+        for key, src in sources.items()
+    }
+
+
+def _fingerprint(config_path: str, config: dict, sources: dict, **extra) -> dict[str, str]:
+    """Хэши всех входов сборки: конфигурации, шаблона и каждого артефакта."""
+    inputs = {
+        'config': sha256_file(config_path),
+        'template': sha256_file(config['prompt_template_path']),
+    }
+    for artifact_key, source in sorted(sources.items()):
+        inputs[f'artifact:{artifact_key}'] = sha256_source(source)
+    inputs.update({key: str(value) for key, value in extra.items()})
+    return inputs
+
+
+def _read_source_text(source) -> str:
+    if isinstance(source, MappedArtifact):
+        return source.read_text()
+    if isinstance(source, pathlib.Path):
+        return source.read_text(encoding='utf-8-sig')
+    return source if isinstance(source, str) else source.read()
+
+
+def _iter_source_lines(source) -> Iterator[str]:
+    """Строки источника по одной (BOM в начале отбрасывается): файлы и выборки из них не читаются целиком."""
+    if isinstance(source, MappedArtifact):
+        lines = source.iter_lines()
+        first = next(lines, None)
+        if first is not None:
+            yield first.removeprefix('\ufeff')
+            yield from lines
+    elif isinstance(source, pathlib.Path):
+        with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from f
+    else:
+        yield from _read_source_text(source).splitlines(keepends=True)
+
+
+def _filter_swagger(config: dict, sources: dict, names: list[str]) -> None:
+    """
+    Заменяет источник swagger-артефакта спецификацией только с операциями, которые совпадают
+    с названиями экранов и секций из names, и схемами из их $ref-замыкания.
+    Если фильтр выключен, спецификацию не удалось разобрать или ничего не совпало — источник не меняется.
+    """
+    swagger_filter = config['swagger_filter']
+    spec_path = sources.get(swagger_filter['artifact'])
+    if not swagger_filter['enabled']:
+        return
+    if isinstance(spec_path, MappedArtifact):
+        raise PromptBuildError(f"❌ Ошибка: swagger_filter не работает с выборкой lines/sections артефакта "
+                               f"'{swagger_filter['artifact']}'. Укажите спецификацию путем или выключите фильтр.")
+    if not isinstance(spec_path, pathlib.Path):
         return
+    try:
+        loaded = swagger_index.load_spec_index(str(spec_path), swagger_filter['cache_dir'])
     except Exception as e:
-        print(f"❌ Ошибка при чтении файла шаблона '{prompt_template_path}': {e}")
+        print(f"⚠️ Предупреждение: Не удалось разобрать спецификацию '{spec_path}': {e}. Она будет вставлена целиком.")
+        return
+    if loaded is None:
+        print(f"⚠️ Предупреждение: PyYAML не установлен, спецификация '{spec_path}' будет вставлена целиком.")
         return
 
-    for artifact_key, artifact_path in artifacts_paths.items():
-        placeholder = placeholders.get(artifact_key)
-        if not placeholder:
-            print(f"⚠️ Предупреждение: Плейсхолдер для артефакта '{artifact_key}' не найден в конфигурации. Пропуск.")
-            continue
-        
-        try:
-            with open(artifact_path, 'r', encoding='utf-8') as f:
-                artifact_content = f.read()
-            prompt_content = prompt_content.replace(placeholder, artifact_content)
-        except FileNotFoundError:
-            print(f"❌ Ошибка: Файл артефакта '{artifact_path}' (для ключа '{artifact_key}') не найден. Выполнение прервано.")
-            return
-        except Exception as e:
-            print(f"❌ Ошибка при чтении файла артефакта '{artifact_path}': {e}")
-            return
-            
+    spec, index = loaded
+    filtered, matched = swagger_index.filter_spec(spec, index, names)
+    if not matched:
+        print(f"⚠️ Предупреждение: Ни одна операция '{spec_path.name}' не совпала с экранами и секциями. Спецификация будет вставлена целиком.")
+        return
+    sources[swagger_filter['artifact']] = swagger_index.dump_spec(filtered, as_json=spec_path.suffix == '.json')
+    print(f"ℹ️ Swagger: в промт включено {len(matched)} из {len(index['operations'])} операций.")
+    dropped = [f"{op['method'].upper()} {op['path']}" for op in index['operations'] if op not in matched]
+    if dropped:
+        shown = ", ".join(dropped[:MAX_DROPPED_OPERATIONS_SHOWN])
+        more = f" и еще {len(dropped) - MAX_DROPPED_OPERATIONS_SHOWN}" if len(dropped) > MAX_DROPPED_OPERATIONS_SHOWN else ""
+        print(f"ℹ️ Swagger: не совпали с экранами и секциями и исключены: {shown}{more}.")
+
+
+def _requirement_names(config: dict, sources: dict) -> list[str]:
+    """Заголовки артефакта требований (swagger_filter.requirements_artifact) для поиска операций."""
+    requirements_key = config['swagger_filter']['requirements_artifact']
+    if requirements_key not in sources:
+        return []
+    return swagger_index.markdown_headings(_iter_source_lines(sources[requirements_key]))
+
+
+def _render_to_file(template: PromptTemplate, sources: dict, transforms: dict, output_path: str) -> None:
+    # Пишем во временный файл и подменяем результат целиком, чтобы не оставить обрезанный промт
+    tmp_output_path = f"{output_path}.tmp"
     try:
-        with open(output_prompt_path, 'w', encoding='utf-8') as f:
-            f.write(prompt_content)
-        print(f"✅ Файл '{output_prompt_path}' успешно сгенерирован.")
+        with open(tmp_output_path, 'wb') as f:
+            template.render_binary(f, sources, transforms)
+        os.replace(tmp_output_path, output_path)
     except Exception as e:
-        print(f"❌ Ошибка при записи в файл '{output_prompt_path}': {e}")
+        if os.path.exists(tmp_output_path):
+            os.remove(tmp_output_path)
+        raise PromptBuildError(f"❌ Ошибка при формировании файла '{output_path}': {e}")
+
+
+def generate_prompt(overrides: dict[str, str | TextIO] | None = None,
+                    config_path: str = DEFAULT_CONFIG_PATH, force: bool = False) -> str:
+    """
+    Собирает итоговый промт по config_artifacts.json и записывает его в output_prompt_path.
+
+    overrides позволяет передать содержимое артефактов из памяти (строкой, потоком или путём)
+    вместо чтения соответствующих файлов с диска. Файлы артефактов открываются по одному
+    и копируются в выходной файл потоком. Если хэши конфигурации, шаблона и артефактов
+    совпадают с прошлой сборкой, файл не перезаписывается (force=True отключает проверку).
+    Возвращает путь к сгенерированному файлу.
+    """
+    config = load_config(config_path)
+    template = _load_template(config)
+    transforms = _load_transforms(config)
+    _warn_missing_placeholders(template, config['artifacts'])
+    sources = _materialize_streams(_collect_sources(config, overrides or {}))
+
+    output_prompt_path = config['output_prompt_path']
+    build_cache = BuildCache(config['build_cache_path'])
+    inputs = _fingerprint(config_path, config, sources)
+    if not force and build_cache.is_fresh(output_prompt_path, inputs):
+        print(f"ℹ️ Входные файлы не изменились, '{output_prompt_path}' не перезаписан (--force для пересборки).")
+        return output_prompt_path
+
+    if config['swagger_filter']['enabled']:
+        names = []
+        # Источники не заменяются текстом: файлы читаются построчно и затем копируются в промт без декодирования
+        if TESTS_FROM_FIGMA_ARTIFACT in sources:
+            header, rows, _ = iter_test_rows(_iter_source_lines(sources[TESTS_FROM_FIGMA_ARTIFACT]))
+            names.extend(test_names(header, rows))
+        names.extend(_requirement_names(config, sources))
+        _filter_swagger(config, sources, names)
+
+    _render_to_file(template, sources, transforms, output_prompt_path)
+    build_cache.record(output_prompt_path, inputs)
+    return output_prompt_path
+
+
+def _source_size(source) -> int:
+    if isinstance(source, MappedArtifact):
+        return source.size()
+    if isinstance(source, pathlib.Path):
+        return os.path.getsize(source)
+    return len(source.encode('utf-8'))
+
+
+def generate_shards(token_budget: int | None = None, overrides: dict[str, str | TextIO] | None = None,
+                    config_path: str = DEFAULT_CONFIG_PATH, force: bool = False) -> str:
+    """
+    Режим шардирования: строки tests_from_figma группируются по экранам (testRepositoryPath),
+    и для каждой группы пишется отдельный промт в пределах бюджета токенов. Остальные
+    артефакты попадают в каждый шард целиком, кроме swagger: при включённом swagger_filter
+    в шард попадают только операции, совпавшие с экранами и секциями этого шарда или с заголовками требований.
+    Бюджет считается по полной спецификации, поэтому фильтрация его только уменьшает.
+    Как и generate_prompt, пропускает пересборку, если входы не изменились.
+    Пути в манифесте записываются относительно output_dir. Промты и ответы шардов прошлых сборок,
+    которых нет в новом манифесте, удаляются, как и ответы шардов с изменившимся промтом.
+    Возвращает путь к манифесту шардов.
+    """
+    config = load_config(config_path)
+    sharding = config['sharding']
+    token_budget = token_budget or sharding['token_budget']
+    template = _load_template(config)
+    transforms = _load_transforms(config)
+    _warn_missing_placeholders(template, config['artifacts'])
+    if TESTS_FROM_FIGMA_ARTIFACT not in template.slot_keys:
+        raise PromptBuildError(f"❌ Ошибка: В шаблоне нет плейсхолдера артефакта '{TESTS_FROM_FIGMA_ARTIFACT}', шардировать нечего.")
+
+    sources = _materialize_streams(_collect_sources(config, overrides or {}))
+
+    manifest_path = os.path.join(sharding['output_dir'], sharding['manifest_name'])
+    build_cache = BuildCache(config['build_cache_path'])
+    inputs = _fingerprint(config_path, config, sources, token_budget=token_budget)
+    if not force and build_cache.is_fresh(manifest_path, inputs) and _shard_prompts_exist(manifest_path):
+        print(f"ℹ️ Входные файлы не изменились, шарды в '{sharding['output_dir']}' не перезаписаны (--force для пересборки).")
+        return manifest_path
+    header, rows, delimiter = read_test_rows(_read_source_text(sources.pop(TESTS_FROM_FIGMA_ARTIFACT)))
+    if not rows:
+        raise PromptBuildError(f"❌ Ошибка: В артефакте '{TESTS_FROM_FIGMA_ARTIFACT}' нет строк тестов.")
+
+    base_bytes = sum(len(value.encode('utf-8')) for kind, value in template.segments if kind == "text")
+    base_bytes += sum(_source_size(src) for key, src in sources.items() if key in template.slot_keys)
+    try:
+        shards = plan_shards(header, rows, delimiter, estimate_tokens(base_bytes), token_budget)
+    except ShardingError as e:
+        raise PromptBuildError(f"❌ Ошибка шардирования: {e}")
+
+    # Как и в generate_prompt: экраны шарда и заголовки требований
+    requirement_names = _requirement_names(config, sources) if config['swagger_filter']['enabled'] else []
+    output_dir = sharding['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_shards = []
+    for shard in shards:
+        prompt_path = os.path.join(output_dir, f"{shard['id']}_prompt.txt")
+        shard_sources = dict(sources)
+        shard_sources[TESTS_FROM_FIGMA_ARTIFACT] = rows_to_csv(header, shard['rows'], delimiter)
+        _filter_swagger(config, shard_sources, test_names(header, shard['rows']) + requirement_names)
+        _render_to_file(template, shard_sources, transforms, prompt_path)
+        manifest_shards.append({
+            "id": shard['id'],
+            "screen": shard['screen'],
+            "rows": len(shard['rows']),
+            "estimated_tokens": shard['estimated_tokens'],
+            "prompt_path": os.path.basename(prompt_path),
+            "prompt_sha256": sha256_file(prompt_path),
+            "output_path": f"{shard['id']}_final_tests.txt",
+        })
+
+    manifest = {
+        "token_budget": token_budget,
+        "merged_output_path": os.path.relpath(sharding['merged_output_path'], output_dir),
+        "shards": manifest_shards,
+    }
+    previous_manifest = _read_manifest(manifest_path)
+    write_manifest(manifest_path, manifest)
+    removed = remove_stale_shard_files(output_dir, manifest, previous_manifest)
+    if removed:
+        print(f"ℹ️ Удалены файлы шардов прошлой сборки: {', '.join(removed)}.")
+    build_cache.record(manifest_path, inputs)
+    return manifest_path
+
+
+def _read_manifest(manifest_path: str) -> dict | None:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _shard_prompts_exist(manifest_path: str) -> bool:
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest_dir = os.path.dirname(manifest_path)
+    return all(os.path.isfile(os.path.join(manifest_dir, shard['prompt_path'])) for shard in manifest['shards'])
+
+
+def merge_shards(config_path: str = DEFAULT_CONFIG_PATH) -> tuple[str, int]:
+    """Склеивает ответы по шардам из манифеста в merged_output_path (final_tests.txt)."""
+    config = load_config(config_path)
+    sharding = config['sharding']
+    manifest_path = os.path.join(sharding['output_dir'], sharding['manifest_name'])
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest_dir = os.path.dirname(manifest_path)
+        merged_output_path = os.path.normpath(os.path.join(manifest_dir, manifest['merged_output_path']))
+        return merged_output_path, merge_shard_outputs(manifest, merged_output_path, manifest_dir)
+    except FileNotFoundError:
+        raise PromptBuildError(f"❌ Ошибка: Манифест шардов '{manifest_path}' не найден. Сначала выполните --shard.")
+    except ShardingError as e:
+        raise PromptBuildError(f"❌ Ошибка склейки шардов: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка итогового промта из артефактов config_artifacts.json.")
+    parser.add_argument('--shard', action='store_true',
+                        help="Разбить промт на шарды по экранам из tests_from_figma и записать манифест.")
+    parser.add_argument('--token-budget', type=int, default=None,
+                        help="Бюджет токенов на один шард (по умолчанию из sharding.token_budget).")
+    parser.add_argument('--merge', action='store_true',
+                        help="Склеить ответы по шардам из манифеста в один final_tests.txt.")
+    parser.add_argument('--force', action='store_true',
+                        help="Пересобрать промт, даже если входные файлы не изменились.")
+    args = parser.parse_args()
+
+    try:
+        if args.merge:
+            merged_output_path, row_count = merge_shards()
+            print(f"✅ Ответы шардов склеены в '{merged_output_path}' ({row_count} тест-кейсов).")
+        elif args.shard:
+            manifest_path = generate_shards(token_budget=args.token_budget, force=args.force)
+            print(f"✅ Шарды промта сгенерированы, манифест: '{manifest_path}'.")
+        else:
+            output_prompt_path = generate_prompt(force=args.force)
+            print(f"✅ Файл '{output_prompt_path}' готов.")
+    except PromptBuildError as e:
+        print(e)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,188 @@
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import re
+from typing import Iterable, Iterator, TextIO
+
+# Грубая оценка: ~4 байта UTF-8 на токен (для кириллицы с запасом)
+BYTES_PER_TOKEN = 4
+
+# Колонки, по которым строки tests_from_figma группируются в экраны
+COL_TEST_REPOSITORY_PATH = "testRepositoryPath"
+COL_SUMMARY = "Summary"
+
+# Файлы шардов в output_dir: промты и ответы модели
+SHARD_FILE_PATTERN = re.compile(r"^shard_\d+_(prompt|final_tests)\.txt$")
+
+
+class ShardingError(Exception):
+    """Невозможно разбить промт на шарды в пределах бюджета токенов."""
+
+
+def estimate_tokens(byte_count: int) -> int:
+    return math.ceil(byte_count / BYTES_PER_TOKEN)
+
+
+def read_test_rows(source: str | TextIO) -> tuple[list[str], list[list[str]], str]:
+    """Читает CSV с тестами из Figma. Разделитель (';' или ',') определяется по заголовку."""
+    text = source if isinstance(source, str) else source.read()
+    header_line = text.split("\n", 1)[0]
+    delimiter = ";" if header_line.count(";") >= header_line.count(",") else ","
+    reader = csv.reader(io.StringIO(text, newline=""), delimiter=delimiter)
+    rows = [row for row in reader if row]
+    if not rows:
+        return [], [], delimiter
+    return rows[0], rows[1:], delimiter
+
+
+def iter_test_rows(lines: Iterable[str]) -> tuple[list[str], Iterator[list[str]], str]:
+    """Как read_test_rows, но строки читаются по одной из итератора строк, без загрузки файла целиком."""
+    lines = iter(lines)
+    header_line = next(lines, "")
+    delimiter = ";" if header_line.count(";") >= header_line.count(",") else ","
+    reader = csv.reader(itertools.chain([header_line], lines), delimiter=delimiter)
+    header = next((row for row in reader if row), [])
+    return header, (row for row in reader if row), delimiter
+
+
+def screen_of(header: list[str], row: list[str]) -> str:
+    """
+    Экран теста: первая часть testRepositoryPath ("Экран/Элемент").
+    Для выгрузок без этой колонки экран берётся из Summary ("Экран. Элемент - ...").
+    """
+    values = dict(zip(header, row))
+    repo_path = values.get(COL_TEST_REPOSITORY_PATH, "").strip()
+    if repo_path:
+        return repo_path.split("/", 1)[0].strip()
+    summary = values.get(COL_SUMMARY, "").strip()
+    for separator in (". ", " - "):
+        if separator in summary:
+            return summary.split(separator, 1)[0].strip()
+    return summary
+
+
+def test_names(header: list[str], rows: Iterable[list[str]]) -> list[str]:
+    """Названия экранов и секций из строк тестов (testRepositoryPath и Summary)."""
+    names = []
+    for row in rows:
+        values = dict(zip(header, row))
+        names.extend(values.get(col, "") for col in (COL_TEST_REPOSITORY_PATH, COL_SUMMARY))
+    return [name for name in names if name.strip()]
+
+
+def group_rows_by_screen(header: list[str], rows: list[list[str]]) -> dict[str, list[list[str]]]:
+    """Группирует строки по экранам, сохраняя порядок первого появления экрана."""
+    groups: dict[str, list[list[str]]] = {}
+    for row in rows:
+        groups.setdefault(screen_of(header, row), []).append(row)
+    return groups
+
+
+def rows_to_csv(header: list[str], rows: list[list[str]], delimiter: str) -> str:
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    if header:
+        writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def plan_shards(header: list[str], rows: list[list[str]], delimiter: str,
+                base_tokens: int, token_budget: int) -> list[dict]:
+    """
+    Делит строки на шарды по экранам. Экран, не помещающийся в бюджет целиком,
+    делится на несколько шардов. base_tokens — стоимость шаблона и остальных артефактов.
+    """
+    header_tokens = estimate_tokens(len(rows_to_csv(header, [], delimiter).encode("utf-8")))
+    available = token_budget - base_tokens - header_tokens
+    if available <= 0:
+        raise ShardingError(
+            f"Шаблон и общие артефакты (~{base_tokens} токенов) не помещаются в бюджет {token_budget} токенов."
+        )
+
+    shards = []
+    for screen, screen_rows in group_rows_by_screen(header, rows).items():
+        current: list[list[str]] = []
+        current_tokens = 0
+        for row in screen_rows:
+            row_tokens = estimate_tokens(len(rows_to_csv([], [row], delimiter).encode("utf-8")))
+            if row_tokens > available:
+                raise ShardingError(f"Строка теста экрана «{screen}» (~{row_tokens} токенов) превышает бюджет шарда.")
+            if current and current_tokens + row_tokens > available:
+                shards.append({"screen": screen, "rows": current, "tokens": current_tokens})
+                current, current_tokens = [], 0
+            current.append(row)
+            current_tokens += row_tokens
+        if current:
+            shards.append({"screen": screen, "rows": current, "tokens": current_tokens})
+
+    for index, shard in enumerate(shards, start=1):
+        shard["id"] = f"shard_{index:03d}"
+        shard["estimated_tokens"] = base_tokens + header_tokens + shard.pop("tokens")
+    return shards
+
+
+def write_manifest(manifest_path: str, manifest: dict) -> None:
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def remove_stale_shard_files(output_dir: str, manifest: dict, previous_manifest: dict | None = None) -> list[str]:
+    """
+    Удаляет из output_dir промты и ответы шардов, которых нет в манифесте, а также ответы шардов,
+    промт которых изменился по сравнению с previous_manifest (id шарда мог достаться другим строкам).
+    Возвращает имена удалённых файлов.
+    """
+    previous_hashes = {shard["id"]: shard.get("prompt_sha256") for shard in (previous_manifest or {}).get("shards", [])}
+    keep = {os.path.basename(shard[key]) for shard in manifest["shards"] for key in ("prompt_path", "output_path")}
+    keep -= {os.path.basename(shard["output_path"]) for shard in manifest["shards"]
+             if previous_hashes.get(shard["id"]) != shard["prompt_sha256"]}
+    removed = []
+    for name in sorted(os.listdir(output_dir)):
+        if SHARD_FILE_PATTERN.match(name) and name not in keep:
+            os.remove(os.path.join(output_dir, name))
+            removed.append(name)
+    return removed
+
+
+def merge_shard_outputs(manifest: dict, merged_output_path: str, shard_dir: str = ".", delimiter: str = ";") -> int:
+    """
+    Склеивает ответы модели по шардам (CSV с заголовком) в один файл. Пути ответов в манифесте
+    считаются от shard_dir (директории манифеста). Заголовок берётся из первого ответа,
+    строки ```-ограждений вокруг CSV отбрасываются. Возвращает количество тест-кейсов в итоговом файле.
+    """
+    output_paths = [os.path.join(shard_dir, shard["output_path"]) for shard in manifest["shards"]]
+    missing = [path for path in output_paths if not os.path.isfile(path)]
+    if missing:
+        raise ShardingError("Нет ответов для шардов: " + ", ".join(missing))
+
+    header = None
+    row_count = 0
+    tmp_path = f"{merged_output_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+            writer = csv.writer(out, delimiter=delimiter, lineterminator="\n")
+            for output_path in output_paths:
+                with open(output_path, "r", encoding="utf-8-sig", newline="") as f:
+                    lines = [line for line in f if not line.lstrip().startswith("```")]
+                rows = [row for row in csv.reader(lines, delimiter=delimiter) if any(cell.strip() for cell in row)]
+                if not rows:
+                    continue
+                if header is None:
+                    header = rows[0]
+                    writer.writerow(header)
+                elif rows[0] != header:
+                    raise ShardingError(f"Заголовок ответа {output_path} отличается от заголовка первого шарда.")
+                writer.writerows(rows[1:])
+                row_count += len(rows) - 1
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, merged_output_path)
+    return row_count
@@ -0,0 +1,161 @@
+import io
+import os
+import pathlib
+import re
+from typing import BinaryIO, Callable, Iterable, TextIO
+
+try:
+    from .artifact_source import MappedArtifact
+except ImportError:  # Запуск как скрипта из create_final_tests/
+    from artifact_source import MappedArtifact
+
+# Размер блока при потоковом копировании артефакта без трансформаций
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Плейсхолдер, перед которым стоит этот символ, выводится как есть (без подстановки)
+ESCAPE_CHAR = "\\"
+
+# Трансформации применяются к артефакту построчно, поэтому не требуют загрузки файла целиком
+TRANSFORMS: dict[str, Callable[[str], str]] = {
+    # Артефакты вставляются внутрь ```-блоков шаблона: разрываем ``` нулевым пробелом,
+    # чтобы содержимое не закрывало блок раньше времени.
+    "escape_code_fences": lambda line: line.replace("```", "`\u200b`\u200b`"),
+    # Убирает хвостовые пробелы, сохраняя перевод строки
+    "rstrip": lambda line: line.rstrip() + ("\n" if line.endswith("\n") else ""),
+}
+
+Source = str | TextIO | os.PathLike
+
+
+def resolve_transforms(names: Iterable[str]) -> list[Callable[[str], str]]:
+    """Возвращает функции трансформаций по их именам из TRANSFORMS."""
+    resolved = []
+    for name in names:
+        if name not in TRANSFORMS:
+            raise ValueError(f"Неизвестная трансформация '{name}'. Доступны: {', '.join(TRANSFORMS)}")
+        resolved.append(TRANSFORMS[name])
+    return resolved
+
+
+class PromptTemplate:
+    """
+    Шаблон промта, разобранный один раз на литералы и слоты плейсхолдеров.
+
+    При рендеринге каждый артефакт пишется в выходной поток ровно один раз и повторно
+    не сканируется, поэтому плейсхолдер внутри артефакта не раскрывается.
+    """
+
+    def __init__(self, text: str, placeholders: dict[str, str]):
+        self.placeholders = {key: ph for key, ph in placeholders.items() if ph}
+        self.segments: list[tuple[str, str]] = []  # ("text", литерал) или ("slot", ключ артефакта)
+        self._tokenise(text)
+
+    @classmethod
+    def from_file(cls, path: str | os.PathLike, placeholders: dict[str, str]) -> "PromptTemplate":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f.read(), placeholders)
+
+    def _tokenise(self, text: str) -> None:
+        if not self.placeholders:
+            self.segments.append(("text", text))
+            return
+
+        key_by_placeholder = {ph: key for key, ph in self.placeholders.items()}
+        # Длинные плейсхолдеры первыми, чтобы префикс не перехватил более длинное совпадение
+        alternatives = "|".join(re.escape(ph) for ph in sorted(key_by_placeholder, key=len, reverse=True))
+        pattern = re.compile(f"({re.escape(ESCAPE_CHAR)})?({alternatives})")
+
+        literal: list[str] = []
+        pos = 0
+        for match in pattern.finditer(text):
+            literal.append(text[pos:match.start()])
+            if match.group(1):
+                literal.append(match.group(2))
+            else:
+                self.segments.append(("text", "".join(literal)))
+                literal = []
+                self.segments.append(("slot", key_by_placeholder[match.group(2)]))
+            pos = match.end()
+        literal.append(text[pos:])
+        self.segments.append(("text", "".join(literal)))
+        self.segments = [seg for seg in self.segments if seg != ("text", "")]
+
+    @property
+    def slot_keys(self) -> set[str]:
+        return {value for kind, value in self.segments if kind == "slot"}
+
+    def render(self, out: TextIO, sources: dict[str, Source],
+               transforms: dict[str, list[Callable[[str], str]]] | None = None) -> None:
+        """
+        Пишет шаблон в out за один проход. Источник артефакта — строка с содержимым,
+        текстовый поток или путь к файлу (os.PathLike), который открывается только на время записи.
+        Слот без источника остаётся в выводе как исходный плейсхолдер.
+        """
+        transforms = transforms or {}
+        for kind, value in self.segments:
+            if kind == "text":
+                out.write(value)
+            elif value in sources:
+                _write_source(out, sources[value], transforms.get(value, []))
+            else:
+                out.write(self.placeholders[value])
+
+    def render_binary(self, out: BinaryIO, sources: dict[str, Source],
+                      transforms: dict[str, list[Callable[[str], str]]] | None = None) -> None:
+        """
+        То же, что render, но в двоичный поток. Файлы артефактов без трансформаций копируются
+        из mmap срезами memoryview, без декодирования и промежуточных строк.
+        """
+        transforms = transforms or {}
+        for kind, value in self.segments:
+            if kind == "text":
+                out.write(value.encode("utf-8"))
+            elif value in sources:
+                _write_source_binary(out, sources[value], transforms.get(value, []))
+            else:
+                out.write(self.placeholders[value].encode("utf-8"))
+
+
+def _write_source_binary(out: BinaryIO, source: Source, transforms: list[Callable[[str], str]]) -> None:
+    if isinstance(source, os.PathLike) and not transforms:
+        (source if isinstance(source, MappedArtifact) else MappedArtifact(source)).write_to(out)
+        return
+    text_out = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    try:
+        _write_source(text_out, source, transforms)
+    finally:
+        text_out.detach()
+
+
+def _write_source(out: TextIO, source: Source, transforms: list[Callable[[str], str]]) -> None:
+    if isinstance(source, MappedArtifact):
+        if transforms:
+            _write_lines(out, source.iter_lines(), transforms)
+        else:
+            for text in source.iter_text():
+                out.write(text)
+    elif isinstance(source, os.PathLike):
+        with open(pathlib.Path(source), "r", encoding="utf-8") as f:
+            _write_stream(out, f, transforms)
+    elif isinstance(source, str):
+        if transforms:
+            _write_lines(out, source.splitlines(keepends=True), transforms)
+        else:
+            out.write(source)
+    else:
+        _write_stream(out, source, transforms)
+
+
+def _write_stream(out: TextIO, stream: TextIO, transforms: list[Callable[[str], str]]) -> None:
+    if transforms:
+        _write_lines(out, stream, transforms)
+        return
+    while chunk := stream.read(COPY_CHUNK_SIZE):
+        out.write(chunk)
+
+
+def _write_lines(out: TextIO, lines: Iterable[str], transforms: list[Callable[[str], str]]) -> None:
+    for line in lines:
+        for transform in transforms:
+            line = transform(line)
+        out.write(line)
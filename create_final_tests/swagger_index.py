@@ -0,0 +1,194 @@
+import json
+import os
+import re
+from typing import Iterable
+
+try:
+    import yaml
+except ImportError:  # PyYAML не установлен: YAML-спецификации будут вставляться целиком
+    yaml = None
+
+try:
+    from .build_cache import sha256_file
+except ImportError:  # Запуск как скрипта из create_final_tests/
+    from build_cache import sha256_file
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Слова из названий тестов и разделов требований, которые не несут смысла для поиска эндпоинтов
+STOP_WORDS = {
+    "screen", "section", "frame", "layout", "logic",
+    "логика", "работы", "компоновка", "позитивные", "негативные", "проверки", "элемент", "экран",
+}
+MIN_WORD_LENGTH = 4
+STEM_LENGTH = 5
+
+# Индексы, уже разобранные в этом процессе (по хэшу файла), чтобы шарды не разбирали спецификацию повторно
+_memory_cache: dict[str, dict] = {}
+
+
+def _words(text: str) -> set[str]:
+    """Слова текста в нижнем регистре; camelCase и snake_case разбиваются на части."""
+    text = re.sub(r"([a-zа-яё])([A-ZА-ЯЁ])", r"\1 \2", text)
+    return {w for w in re.split(r"[\W_]+", text.lower()) if len(w) >= MIN_WORD_LENGTH and w not in STOP_WORDS}
+
+
+def _stems(words: set[str]) -> set[str]:
+    # Усечение до общего префикса покрывает формы слова: banner/banners, бонусы/бонусах
+    return {w[:STEM_LENGTH] for w in words}
+
+
+def _collect_refs(node, refs: set[str]) -> None:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/"):
+            refs.add(ref)
+        for value in node.values():
+            _collect_refs(value, refs)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_refs(item, refs)
+
+
+def _resolve_pointer(spec: dict, ref: str):
+    node = spec
+    for part in ref[2:].split("/"):
+        part = part.replace("~1", "/").replace("~0", "~")
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def build_index(spec: dict) -> dict:
+    """Индекс операций спецификации: путь, метод, слова для поиска и прямые $ref."""
+    operations = []
+    for path, path_item in (spec.get("paths") or {}).items():
+        if not isinstance(path_item, dict):
+            continue
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if not isinstance(operation, dict):
+                continue
+            text = " ".join([path, operation.get("summary", ""), operation.get("operationId", ""),
+                             " ".join(operation.get("tags", []))])
+            refs: set[str] = set()
+            _collect_refs(operation, refs)
+            _collect_refs({k: v for k, v in path_item.items() if k not in HTTP_METHODS}, refs)
+            operations.append({
+                "path": path,
+                "method": method,
+                "stems": sorted(_stems(_words(text))),
+                "refs": sorted(refs),
+            })
+    return {"operations": operations}
+
+
+def load_spec_index(spec_path: str, cache_dir: str | None = None) -> tuple[dict, dict] | None:
+    """
+    Возвращает (спецификация, индекс). Результат кэшируется по SHA-256 файла: в памяти процесса
+    и в cache_dir в виде JSON, который читается намного быстрее YAML.
+    None, если спецификацию нельзя разобрать (например, YAML без установленного PyYAML).
+    """
+    sha = sha256_file(spec_path)
+    if sha in _memory_cache:
+        return _memory_cache[sha]["spec"], _memory_cache[sha]["index"]
+
+    cache_path = os.path.join(cache_dir, f"swagger_index_{sha[:16]}.json") if cache_dir else None
+    if cache_path and os.path.isfile(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    else:
+        with open(spec_path, "r", encoding="utf-8") as f:
+            if spec_path.endswith(".json"):
+                spec = json.load(f)
+            elif yaml is not None:
+                spec = yaml.safe_load(f)
+            else:
+                return None
+        if not isinstance(spec, dict):
+            return None
+        cached = {"spec": spec, "index": build_index(spec)}
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cached, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, cache_path)
+
+    _memory_cache[sha] = cached
+    return cached["spec"], cached["index"]
+
+
+def _ref_closure(spec: dict, refs: set[str]) -> set[str]:
+    closure: set[str] = set()
+    pending = list(refs)
+    while pending:
+        ref = pending.pop()
+        if ref in closure:
+            continue
+        closure.add(ref)
+        nested: set[str] = set()
+        _collect_refs(_resolve_pointer(spec, ref), nested)
+        pending.extend(nested - closure)
+    return closure
+
+
+def filter_spec(spec: dict, index: dict, names: list[str]) -> tuple[dict, list[dict]]:
+    """
+    Оставляет в спецификации только операции, чьи путь, теги, summary или operationId совпадают
+    со словами из names, и компоненты из их $ref-замыкания. Схемы безопасности (securitySchemes
+    и верхнеуровневый security) сохраняются всегда. Возвращает (спецификация, совпавшие операции индекса).
+    """
+    wanted = _stems(set().union(*(_words(name) for name in names))) if names else set()
+    matched = [op for op in index["operations"] if wanted & set(op["stems"])]
+
+    paths: dict = {}
+    refs: set[str] = set()
+    for op in matched:
+        path_item = spec["paths"][op["path"]]
+        target = paths.setdefault(op["path"], {k: v for k, v in path_item.items() if k not in HTTP_METHODS})
+        target[op["method"]] = path_item[op["method"]]
+        refs.update(op["refs"])
+
+    used_tags = {tag for item in paths.values() for method in HTTP_METHODS
+                 for tag in (item.get(method) or {}).get("tags", [])}
+    components: dict = {}
+    # На схемы безопасности ссылаются по имени из security, а не через $ref
+    if isinstance(spec.get("components"), dict) and "securitySchemes" in spec["components"]:
+        components["securitySchemes"] = spec["components"]["securitySchemes"]
+    for ref in sorted(_ref_closure(spec, refs)):
+        parts = ref[2:].split("/")
+        if len(parts) == 3 and parts[0] == "components":
+            components.setdefault(parts[1], {})[parts[2]] = spec["components"][parts[1]][parts[2]]
+
+    # Порядок верхнеуровневых ключей сохраняется, чтобы фрагмент читался как исходная спецификация
+    filtered = {}
+    for key, value in spec.items():
+        if key == "paths":
+            filtered[key] = paths
+        elif key == "tags" and isinstance(value, list):
+            filtered[key] = [tag for tag in value if isinstance(tag, dict) and tag.get("name") in used_tags]
+        elif key == "components":
+            if components:
+                filtered[key] = components
+        else:
+            filtered[key] = value
+    return filtered, matched
+
+
+def dump_spec(spec: dict, as_json: bool) -> str:
+    if as_json or yaml is None:
+        return json.dumps(spec, ensure_ascii=False, indent=2)
+    return yaml.safe_dump(spec, allow_unicode=True, sort_keys=False)
+
+
+def markdown_headings(text: str | Iterable[str], max_level: int = 1) -> list[str]:
+    """Заголовки markdown до уровня max_level без разметки (**, \\_, {#anchor}); text — строка или итератор строк."""
+    headings = []
+    for line in text.splitlines() if isinstance(text, str) else text:
+        match = re.match(r"^(#{1,6})\s+(.*)$", line.rstrip("\r\n"))
+        if match and len(match.group(1)) <= max_level:
+            title = re.sub(r"\{#[^}]*\}", "", match.group(2))
+            headings.append(title.replace("\\", "").replace("*", "").strip())
+    return headings
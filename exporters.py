@@ -0,0 +1,177 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import pathlib
+
+# Колонки тест-кейса в порядке TXT/CSV-выгрузки
+EXPORT_FIELDS = [
+    "TestCaseIdentifier", "Summary", "Description", "Priority", "Labels",
+    "Action", "Data", "ExpectedResult", "Board",
+    "testRepositoryPath", "testCaseType"
+]
+
+
+class TestCaseExporter:
+    """
+    Потоковая выгрузка тест-кейсов. Строки пишутся во временный файл <path>.part по мере
+    поступления и сбрасываются на диск каждые flush_every строк, так что при сбое прогона
+    они сохраняются; commit() атомарно переименовывает файл в path, abort() удаляет его.
+    Параллельно считается SHA-256 записанного текста, в котором hash_mask (old, new)
+    заменяется, чтобы метка прогона не влияла на хэш. С csv_copy_delimiter те же строки
+    дополнительно собираются в памяти в CSV (csv_copy()) — для промта, который ждет CSV.
+    """
+    extension = ".txt"
+
+    def __init__(self, path: str | os.PathLike, flush_every: int = 50, hash_mask: tuple[str, str] | None = None,
+                 csv_copy_delimiter: str | None = None):
+        self.path = pathlib.Path(path)
+        self.part_path = self.path.with_name(self.path.name + ".part")
+        self.flush_every = flush_every
+        self.hash_mask = hash_mask
+        self.rows_written = 0
+        self._digest = hashlib.sha256()
+        self._fh = None
+        self._csv_copy = None
+        if csv_copy_delimiter:
+            self._csv_copy = io.StringIO(newline="")
+            self._csv_copy_writer = csv.writer(self._csv_copy, delimiter=csv_copy_delimiter)
+            self._csv_copy_writer.writerow(EXPORT_FIELDS)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        # После сбоя уже записанные строки остаются в .part-файле
+        if exc_type is not None and self._fh is not None and not self._fh.closed:
+            self._fh.close()
+
+    def open(self) -> "TestCaseExporter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.part_path, "w", newline="", encoding="utf-8")
+        self._emit(self._header())
+        return self
+
+    def write(self, row: dict) -> None:
+        self._emit(self._row(row))
+        if self._csv_copy is not None:
+            self._csv_copy_writer.writerow([row.get(field, "") for field in EXPORT_FIELDS])
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def finish(self) -> str:
+        """Дописывает окончание файла, закрывает его и возвращает хэш содержимого (hex)."""
+        self._emit(self._footer())
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        return self._digest.hexdigest()
+
+    def csv_copy(self) -> str | None:
+        return self._csv_copy.getvalue() if self._csv_copy is not None else None
+
+    def commit(self) -> pathlib.Path:
+        self.part_path.replace(self.path)
+        return self.path
+
+    def abort(self) -> None:
+        if self._fh is not None and not self._fh.closed:
+            self._fh.close()
+        self.part_path.unlink(missing_ok=True)
+
+    def _emit(self, text: str) -> None:
+        if not text:
+            return
+        self._fh.write(text)
+        if self.hash_mask:
+            text = text.replace(*self.hash_mask)
+        self._digest.update(text.encode("utf-8"))
+
+    def _header(self) -> str:
+        return ""
+
+    def _row(self, row: dict) -> str:
+        raise NotImplementedError
+
+    def _footer(self) -> str:
+        return ""
+
+
+class CsvExporter(TestCaseExporter):
+    """Текущий формат: CSV с заголовком EXPORT_FIELDS и разделителем delimiter."""
+
+    def __init__(self, path, delimiter: str = ";", **kwargs):
+        super().__init__(path, **kwargs)
+        self.delimiter = delimiter
+
+    def _format(self, values: list[str]) -> str:
+        buffer = io.StringIO(newline="")
+        csv.writer(buffer, delimiter=self.delimiter).writerow(values)
+        return buffer.getvalue()
+
+    def _header(self) -> str:
+        return self._format(EXPORT_FIELDS)
+
+    def _row(self, row: dict) -> str:
+        return self._format([row.get(field, "") for field in EXPORT_FIELDS])
+
+
+class JsonlExporter(TestCaseExporter):
+    """Один JSON-объект с колонками EXPORT_FIELDS на строку."""
+    extension = ".jsonl"
+
+    def _row(self, row: dict) -> str:
+        return json.dumps({field: row.get(field, "") for field in EXPORT_FIELDS}, ensure_ascii=False) + "\n"
+
+
+class XrayJsonExporter(TestCaseExporter):
+    """JSON-массив в формате импорта тестов Xray (testtype, fields, steps, xray_test_repository_folder)."""
+    extension = ".json"
+
+    def __init__(self, path, project_key: str = "", test_case_type_field: str | None = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.project_key = project_key
+        self.test_case_type_field = test_case_type_field
+
+    def _header(self) -> str:
+        return "["
+
+    def _row(self, row: dict) -> str:
+        fields = {
+            "project": {"key": self.project_key},
+            "summary": row.get("Summary", ""),
+            "description": row.get("Description", ""),
+            "priority": {"name": row.get("Priority", "")},
+            "labels": [label for label in row.get("Labels", "").split(",") if label],
+        }
+        if self.test_case_type_field and row.get("testCaseType"):
+            fields[self.test_case_type_field] = {"value": row["testCaseType"]}
+        test = {
+            "testtype": "Manual",
+            "fields": fields,
+            "steps": [{"action": row.get("Action", ""), "data": row.get("Data", ""), "result": row.get("ExpectedResult", "")}],
+            "xray_test_repository_folder": row.get("testRepositoryPath", ""),
+        }
+        separator = "\n" if self.rows_written == 0 else ",\n"
+        return separator + json.dumps(test, ensure_ascii=False)
+
+    def _footer(self) -> str:
+        return "\n]\n"
+
+
+EXPORTERS = {
+    "csv": CsvExporter,
+    "jsonl": JsonlExporter,
+    "xray_json": XrayJsonExporter,
+}
+
+
+def create_exporter(export_format: str, path: str | os.PathLike, **options) -> TestCaseExporter:
+    try:
+        exporter_cls = EXPORTERS[export_format]
+    except KeyError:
+        raise ValueError(f"Unknown export format '{export_format}'. Available: {', '.join(EXPORTERS)}") from None
+    return exporter_cls(path, **options)
@@ -1,15 +1,25 @@
 import requests
 import re
+import hashlib
+import pathlib
+import threading
 from logger_setup import setup_logger
+from http_cassette import Cassette, mount_cassette
 
 logger = setup_logger(__name__)
 
 class FigmaClient:
     BASE_URL = "https://api.figma.com/v1"
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, cassette: Cassette | None = None):
         self.session = requests.Session()
         self.session.headers.update({"X-Figma-Token": token})
+        # Image URLs point to S3 or other external hosts, so they get a session without the Figma token
+        self.download_session = requests.Session()
+        mount_cassette(self.session, cassette)
+        mount_cassette(self.download_session, cassette)
+        self.bytes_downloaded = 0 # Image bytes streamed to disk by download_image_to_file
+        self._bytes_lock = threading.Lock()
 
     def get(self, endpoint: str, **params) -> dict:
         try:
@@ -20,36 +30,69 @@ class FigmaClient:
             logger.error(f"Figma API request failed: {e}")
             raise
 
-    def get_file_tree(self, file_key: str) -> dict:
-        return self.get(f"files/{file_key}")
+    def get_file_tree(self, file_key: str, depth: int | None = None) -> dict:
+        """Fetches the document. With depth, only that many levels are returned (1 = pages only)."""
+        if depth is None:
+            return self.get(f"files/{file_key}")
+        return self.get(f"files/{file_key}", depth=depth)
+
+    def get_file_version(self, file_key: str) -> str | None:
+        """Current version id of the file; a depth=1 request keeps the response small."""
+        return self.get(f"files/{file_key}", depth=1).get("version")
 
     def get_nodes(self, file_key: str, ids: str) -> dict:
         return self.get(f"files/{file_key}/nodes", ids=ids)
 
+    def get_image_urls(self, file_key: str, node_ids: list[str], scale: float | int) -> dict[str, str | None]:
+        """Renders several nodes at the same scale in one request. Returns node id -> image URL (None if not rendered)."""
+        data = self.get(f"images/{file_key}", ids=",".join(node_ids), format="png", scale=scale)
+        images = data.get("images") or {}
+        return {node_id: images.get(node_id) for node_id in node_ids}
+
     def get_image_url(self, file_key: str, node_id: str, scale: float | int) -> str | None:
         try:
-            data = self.get(f"images/{file_key}", ids=node_id, format="png", scale=scale)
-            return data["images"].get(node_id)
+            return self.get_image_urls(file_key, [node_id], scale)[node_id]
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 logger.warning(f"Image not found for node {node_id} in file {file_key}: {e}")
                 return None
             raise
-        except KeyError: # If 'images' key is missing
-            logger.warning(f"\'images\' key not found in response for node {node_id} in file {file_key}")
-            return None
 
 
     def download_image_data(self, image_url: str) -> bytes:
         try:
-            # Using a new requests.get as image_url might be S3 or other external URL
-            response = requests.get(image_url)
+            response = self.download_session.get(image_url)
             response.raise_for_status()
             return response.content
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to download image from {image_url}: {e}")
             raise
 
+    def download_image_to_file(self, image_url: str, path: pathlib.Path, chunk_size: int = 64 * 1024) -> tuple[int, str]:
+        """Streams the image to path in chunks, hashing it on the way. Returns (bytes written, sha256 hex)."""
+        digest = hashlib.sha256()
+        size = 0
+        part_path = path.with_name(path.name + ".part")
+        try:
+            with self.download_session.get(image_url, stream=True) as response:
+                response.raise_for_status()
+                with part_path.open("wb") as fh:
+                    for chunk in response.iter_content(chunk_size):
+                        fh.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            part_path.replace(path)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to download image from {image_url}: {e}")
+            part_path.unlink(missing_ok=True)
+            raise
+        except OSError:
+            part_path.unlink(missing_ok=True)
+            raise
+        with self._bytes_lock:
+            self.bytes_downloaded += size
+        return size, digest.hexdigest()
+
 def parse_file_key(url: str) -> str:
     """Извлекает FILE_KEY из URL Figma."""
     m = re.search(r"/(?:file|design|proto)/([^/]+)/", url)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+
+import argparse
+import copy
+import datetime
+import http.server
+import json
+import os
+import queue
+import threading
+import time
+
+import requests
+
+from logger_setup import setup_logger
+import config
+from figma_client import FigmaClient, parse_file_key
+from jira_client import JiraClient
+from http_cassette import cassette_from_config
+from screen_cache import ScreenCache
+import send_figma_tests_all_tests as generator
+
+# -------- Logging Setup ---------------------------------------------------- #
+logger = setup_logger(__name__)
+
+# -------- Watch Configuration ---------------------------------------------- #
+WATCH_FILE_URLS = getattr(config, "WATCH_FILE_URLS", None) or [config.FIGMA_FILE_URL]
+WATCH_POLL_INTERVAL = getattr(config, "WATCH_POLL_INTERVAL", 60) # Seconds between version checks; 0/None = webhook only
+WATCH_DEBOUNCE_SECONDS = getattr(config, "WATCH_DEBOUNCE_SECONDS", 30) # Quiet period after the last change before a run
+WATCH_QUEUE_SIZE = getattr(config, "WATCH_QUEUE_SIZE", 10)
+WATCH_HTTP_HOST = getattr(config, "WATCH_HTTP_HOST", "127.0.0.1")
+WATCH_HTTP_PORT = getattr(config, "WATCH_HTTP_PORT", 8787) # None disables the webhook/status endpoint
+WATCH_WEBHOOK_PASSCODE = getattr(config, "WATCH_WEBHOOK_PASSCODE", "")
+# Versions that were already regenerated, per file; kept on disk so a restart does not repeat a run
+WATCH_STATE_PATH = getattr(config, "WATCH_STATE_PATH", "create_final_tests/artifacts/.cache/figma_watch_versions.json")
+
+WEBHOOK_EVENTS = ("FILE_UPDATE", "FILE_VERSION_UPDATE")
+SCHEDULER_TICK_SECONDS = 1
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class WatchService:
+    """
+    Keeps the generator running for a set of Figma files. Changes come from version polling or
+    webhook POSTs; bursts are debounced per file, and regeneration jobs go through a bounded queue
+    to a single worker that reuses warm API clients (and the in-process prompt caches) between runs.
+    Each job is tied to the file version it was queued for, and a version is regenerated at most once.
+    Runs are incremental: screens whose node document did not change reuse their PNGs from a per-file
+    screen cache (kept next to WATCH_STATE_PATH), and in JIRA_EXPORT their issues are not created again.
+    """
+
+    def __init__(self, file_urls: list[str]):
+        self.files = {parse_file_key(url): url for url in file_urls}
+        self.jobs: queue.Queue = queue.Queue(maxsize=WATCH_QUEUE_SIZE)
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        exported = self._load_exported_versions()
+        self._state = {
+            file_key: {"url": url, "version": None, "exported_version": exported.get(file_key),
+                       "queued_version": None, "last_checked": None, "pending_since": None,
+                       "last_change": None, "queued": False, "last_run": None}
+            for file_key, url in self.files.items()
+        }
+        state_dir = os.path.dirname(WATCH_STATE_PATH)
+        self.screen_caches = {file_key: ScreenCache(os.path.join(state_dir, f"figma_watch_screens_{file_key}.json"))
+                              for file_key in self.files}
+        self._running = None
+        self._runs_completed = 0
+
+        cassette = cassette_from_config(config)
+        # The poller gets its own session so version checks never wait behind a running job
+        self.poll_client = FigmaClient(token=config.FIGMA_TOKEN, cassette=cassette)
+        self._poll_lock = threading.Lock() # Webhook handler threads share the poll client with the poller
+        self.figma_client = FigmaClient(token=config.FIGMA_TOKEN, cassette=cassette)
+        self.jira_client = None
+        if generator.OPERATIONAL_MODE == "JIRA_EXPORT":
+            self.jira_client = JiraClient(base_url=config.JIRA_URL, username=config.JIRA_USERNAME,
+                                          password=config.JIRA_PASSWORD, cassette=cassette)
+
+    # ---------- Version state ------------------------------------------------- #
+    @staticmethod
+    def _load_exported_versions() -> dict[str, str]:
+        try:
+            with open(WATCH_STATE_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_exported_versions(self) -> None:
+        """Called with self._lock held."""
+        exported = self._load_exported_versions() # Keeps entries of files watched by other configurations
+        exported.update({file_key: state["exported_version"] for file_key, state in self._state.items()
+                         if state["exported_version"] is not None})
+        os.makedirs(os.path.dirname(WATCH_STATE_PATH) or ".", exist_ok=True)
+        tmp_path = f"{WATCH_STATE_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(exported, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, WATCH_STATE_PATH)
+
+    def _fetch_version(self, file_key: str) -> str | None:
+        try:
+            with self._poll_lock:
+                return self.poll_client.get_file_version(file_key)
+        except requests.exceptions.RequestException:
+            logger.error(f"❌ Failed to check the version of {file_key}.")
+            return None
+
+    # ---------- Change detection -------------------------------------------- #
+    def notify_change(self, file_key: str, version: str | None, source: str) -> bool:
+        """
+        Marks the file as changed; the scheduler enqueues it once no new changes arrive for the debounce period.
+        Without a version (webhooks other than FILE_VERSION_UPDATE) the current one is fetched, so the poller
+        does not report the same edit again. A version that was already regenerated is ignored.
+        """
+        if file_key not in self._state:
+            return False
+        if version is None:
+            version = self._fetch_version(file_key)
+        with self._lock:
+            state = self._state[file_key]
+            if version is not None:
+                if version == state["exported_version"]:
+                    logger.info(f"ℹ️ {file_key} version {version} from {source} is already regenerated, ignoring.")
+                    return True
+                state["version"] = version
+            if state["pending_since"] is None:
+                state["pending_since"] = _now()
+            state["last_change"] = time.monotonic()
+        logger.info(f"🔔 Change detected in {file_key} via {source} (version {version or 'unknown'})")
+        return True
+
+    def poll_versions(self, initial: bool = False) -> None:
+        for file_key in self.files:
+            version = self._fetch_version(file_key)
+            if version is None:
+                continue
+            with self._lock:
+                state = self._state[file_key]
+                previous = state["version"]
+                state["last_checked"] = _now()
+                # On startup only versions changed since the last regeneration (from WATCH_STATE_PATH) count
+                if previous is None and (state["exported_version"] is None or not initial):
+                    state["version"] = version
+                    continue
+                previous = previous or state["exported_version"]
+            if version != previous:
+                self.notify_change(file_key, version, "polling")
+
+    def _poll_loop(self) -> None:
+        while not self.stop_event.wait(WATCH_POLL_INTERVAL):
+            self.poll_versions()
+
+    # ---------- Scheduling and work ------------------------------------------ #
+    def _schedule_loop(self) -> None:
+        while not self.stop_event.wait(SCHEDULER_TICK_SECONDS):
+            now = time.monotonic()
+            with self._lock:
+                ready = [file_key for file_key, state in self._state.items()
+                         if state["last_change"] is not None and not state["queued"]
+                         and now - state["last_change"] >= WATCH_DEBOUNCE_SECONDS]
+            for file_key in ready:
+                self.enqueue(file_key)
+
+    def enqueue(self, file_key: str) -> bool:
+        with self._lock:
+            state = self._state[file_key]
+            try:
+                self.jobs.put_nowait(file_key)
+            except queue.Full:
+                logger.warning(f"⚠️ Job queue is full ({WATCH_QUEUE_SIZE}); {file_key} stays pending.")
+                return False
+            state["queued"] = True
+            state["queued_version"] = state["version"]
+            state["last_change"] = None
+        logger.info(f"📥 Queued regeneration for {file_key}")
+        return True
+
+    def _worker_loop(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                file_key = self.jobs.get(timeout=SCHEDULER_TICK_SECONDS)
+            except queue.Empty:
+                continue
+            with self._lock:
+                state = self._state[file_key]
+                state["queued"] = False
+                # Changes that arrive during the run start a new debounce period and a new job
+                state["pending_since"] = None
+                version = state["queued_version"]
+                already_exported = version is not None and version == state["exported_version"]
+                if not already_exported:
+                    self._running = file_key
+            if already_exported:
+                logger.info(f"ℹ️ {file_key} version {version} is already regenerated, skipping the run.")
+            else:
+                self._run_job(file_key, state["url"], version)
+            self.jobs.task_done()
+
+    def _run_job(self, file_key: str, file_url: str, version: str | None) -> None:
+        """
+        Runs the generator for the file, reusing the renders of unchanged screens. The version is recorded, and
+        the screens rendered in this run are added to the screen cache, only if the generator reports that the
+        run was complete; otherwise the next change (or a restart) regenerates the file again.
+        """
+        run_id = generator.start_run(file_url)
+        started = time.monotonic()
+        run = {"run_id": run_id, "started_at": _now(), "status": "running"}
+        with self._lock:
+            self._state[file_key]["last_run"] = run
+        screen_cache = self.screen_caches[file_key]
+        try:
+            ok = generator.main(figma_client=self.figma_client, jira_client=self.jira_client, screen_cache=screen_cache)
+            status = "ok" if ok else "incomplete"
+        except Exception as e: # Keep the service alive; the failure is reported in /status
+            logger.exception(f"❌ Regeneration of {file_key} failed: {e}")
+            status = f"error: {e}"
+        if status == "ok":
+            screen_cache.commit()
+        else:
+            screen_cache.discard()
+        with self._lock:
+            run["status"] = status
+            run["version"] = version
+            run["duration_seconds"] = round(time.monotonic() - started, 2)
+            if status == "ok" and version is not None:
+                self._state[file_key]["exported_version"] = version
+                self._save_exported_versions()
+            self._running = None
+            self._runs_completed += 1
+        logger.info(f"🏁 Regeneration of {file_key} finished ({run['status']}, runid_{run_id})")
+
+    def status(self) -> dict:
+        with self._lock:
+            files = {file_key: {k: copy.deepcopy(v) for k, v in state.items() if k != "last_change"}
+                     for file_key, state in self._state.items()}
+            return {
+                "files": files,
+                "queue": {"size": self.jobs.qsize(), "max_size": WATCH_QUEUE_SIZE},
+                "running": self._running,
+                "runs_completed": self._runs_completed,
+            }
+
+    # ---------- Lifecycle ----------------------------------------------------- #
+    def start(self, run_on_start: bool = False) -> None:
+        self.poll_versions(initial=True)
+        threads = [self._schedule_loop, self._worker_loop]
+        if WATCH_POLL_INTERVAL:
+            threads.append(self._poll_loop)
+        for target in threads:
+            threading.Thread(target=target, name=target.__name__, daemon=True).start()
+        if run_on_start:
+            for file_key in self.files:
+                self.enqueue(file_key)
+        logger.info(f"👀 Watching {len(self.files)} Figma file(s): poll every {WATCH_POLL_INTERVAL or '-'} s, "
+                    f"debounce {WATCH_DEBOUNCE_SECONDS} s, queue size {WATCH_QUEUE_SIZE}")
+
+
+def _make_handler(service: WatchService):
+    class WatchRequestHandler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, format, *args): # Requests are logged through our logger instead of stderr
+            logger.debug(f"HTTP {self.address_string()} {format % args}")
+
+        def _send_json(self, code: int, body: dict) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/status":
+                self._send_json(200, service.status())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/webhook":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                self._send_json(400, {"error": "invalid JSON"})
+                return
+            if WATCH_WEBHOOK_PASSCODE and payload.get("passcode") != WATCH_WEBHOOK_PASSCODE:
+                self._send_json(403, {"error": "invalid passcode"})
+                return
+            event_type = payload.get("event_type")
+            if event_type == "PING":
+                self._send_json(200, {"accepted": False, "reason": "ping"})
+                return
+            if event_type not in WEBHOOK_EVENTS:
+                self._send_json(200, {"accepted": False, "reason": f"ignored event {event_type}"})
+                return
+            file_key = payload.get("file_key")
+            # FILE_VERSION_UPDATE carries version_id; for FILE_UPDATE the service fetches the current version
+            accepted = service.notify_change(file_key, payload.get("version_id"), f"webhook {event_type}")
+            self._send_json(202 if accepted else 404,
+                            {"accepted": accepted} if accepted else {"error": f"file {file_key} is not watched"})
+
+    return WatchRequestHandler
+
+
+def main(run_on_start: bool = False):
+    service = WatchService(WATCH_FILE_URLS)
+    service.start(run_on_start=run_on_start)
+    server = None
+    if WATCH_HTTP_PORT:
+        server = http.server.ThreadingHTTPServer((WATCH_HTTP_HOST, WATCH_HTTP_PORT), _make_handler(service))
+        threading.Thread(target=server.serve_forever, name="http", daemon=True).start()
+        logger.info(f"🌐 Webhook: POST http://{WATCH_HTTP_HOST}:{WATCH_HTTP_PORT}/webhook, "
+                    f"status: GET http://{WATCH_HTTP_HOST}:{WATCH_HTTP_PORT}/status")
+    try:
+        service.stop_event.wait()
+    except KeyboardInterrupt:
+        logger.info("🛑 Stopping watch service...")
+    finally:
+        service.stop_event.set()
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate Figma tests whenever the watched files change.")
+    parser.add_argument("--run-on-start", action="store_true",
+                        help="Queue a regeneration for every watched file right after startup.")
+    main(run_on_start=parser.parse_args().run_on_start)
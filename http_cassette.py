@@ -0,0 +1,153 @@
+import gzip
+import json
+import pathlib
+import struct
+import threading
+import time
+import urllib.parse
+from collections import defaultdict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+# Заголовок записи: длина JSON-метаданных (4 байта, big-endian), затем метаданные и тело ответа как есть
+_RECORD_HEADER = struct.Struct(">I")
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """В кассете нет записанного ответа для запроса (режим replay)."""
+
+
+def _request_key(method: str, url: str) -> str:
+    """Ключ запроса: метод и URL с отсортированными параметрами. Тело и заголовки не учитываются."""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{method.upper()} {urllib.parse.urlunsplit(parts._replace(query=query))}"
+
+
+class Cassette:
+    """
+    Кассета HTTP-взаимодействий для детерминированных прогонов.
+
+    В режиме record каждый ответ (статус, Content-Type, тело, включая PNG) сразу дописывается
+    в сжатый gzip-файл. В режиме replay ответы отдаются из файла без сети: для каждого ключа
+    (метод + URL) в порядке записи, последний ответ повторяется. Тела запросов не сравниваются,
+    поэтому create_issue с другим runid_-label получает записанный ответ по порядку вызовов.
+    """
+
+    def __init__(self, path: str | pathlib.Path, mode: str, latency: float | str | None = None):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}'. Use '{MODE_RECORD}' or '{MODE_REPLAY}'.")
+        self.path = pathlib.Path(path)
+        self.mode = mode
+        self.latency = latency  # None, секунды или "recorded" (задержка как при записи)
+        self._lock = threading.Lock()
+        self._interactions: dict[str, deque] = defaultdict(deque)
+        self._last: dict[str, dict] = {}
+
+        if mode == MODE_RECORD:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(b"")  # Новая запись начинается с пустой кассеты
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        count = 0
+        with gzip.open(self.path, "rb") as fh:
+            while header := fh.read(_RECORD_HEADER.size):
+                (meta_len,) = _RECORD_HEADER.unpack(header)
+                meta = json.loads(fh.read(meta_len))
+                meta["body"] = fh.read(meta.pop("body_len"))
+                self._interactions[meta["key"]].append(meta)
+                count += 1
+        logger.info(f"📼 Loaded {count} recorded HTTP interactions from {self.path}")
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float) -> None:
+        body = response.content
+        meta = json.dumps({
+            "key": _request_key(request.method, request.url),
+            "status": response.status_code,
+            "reason": response.reason,
+            "content_type": response.headers.get("Content-Type"),
+            "elapsed": round(elapsed, 4),
+            "body_len": len(body),
+        }).encode("utf-8")
+        with self._lock:
+            # Каждая запись — отдельный gzip-член: файл остаётся читаемым, даже если прогон прервался
+            with gzip.open(self.path, "ab") as fh:
+                fh.write(_RECORD_HEADER.pack(len(meta)) + meta + body)
+
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        key = _request_key(request.method, request.url)
+        with self._lock:
+            queue = self._interactions.get(key)
+            if queue:
+                interaction = queue.popleft()
+                self._last[key] = interaction
+            elif key in self._last:
+                interaction = self._last[key]
+            else:
+                raise CassetteMissError(f"No recorded response for {key} in cassette {self.path}", request=request)
+
+        if self.latency == "recorded":
+            time.sleep(interaction["elapsed"])
+        elif self.latency:
+            time.sleep(float(self.latency))
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.reason = interaction["reason"]
+        response.headers = CaseInsensitiveDict()
+        if interaction["content_type"]:
+            response.headers["Content-Type"] = interaction["content_type"]
+        response.headers["Content-Length"] = str(len(interaction["body"]))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = interaction["body"]
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Транспорт requests, который записывает ответы в кассету или отдаёт их из неё."""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == MODE_REPLAY:
+            return self.cassette.replay(request)
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        response.content  # Тело читается целиком, чтобы попасть в кассету
+        self.cassette.record(request, response, time.perf_counter() - started)
+        return response
+
+
+def mount_cassette(session: requests.Session, cassette: "Cassette | None") -> None:
+    if cassette is not None:
+        adapter = CassetteAdapter(cassette)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+
+def cassette_from_config(config_module) -> Cassette | None:
+    """Создаёт кассету по HTTP_CASSETTE_MODE / HTTP_CASSETTE_PATH / HTTP_CASSETTE_LATENCY из config.py."""
+    mode = getattr(config_module, "HTTP_CASSETTE_MODE", None)
+    if not mode:
+        return None
+    path = getattr(config_module, "HTTP_CASSETTE_PATH", "cassettes/run.cassette")
+    latency = getattr(config_module, "HTTP_CASSETTE_LATENCY", None)
+    logger.info(f"📼 HTTP cassette mode: {mode} ({path})")
+    return Cassette(path, mode, latency)
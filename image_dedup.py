@@ -0,0 +1,89 @@
+import hashlib
+import pathlib
+
+try:
+    from PIL import Image, ImageStat
+except ImportError:  # Pillow необязателен: без него дедупликация отключается
+    Image = None
+
+from logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Размер difference hash: (HASH_SIZE + 1) x HASH_SIZE пикселей в оттенках серого -> 64 бита
+HASH_SIZE = 8
+# Допустимое относительное отличие пропорций (ширина / высота): хэш их не учитывает
+ASPECT_TOLERANCE = 0.1
+# Изображения со стандартным отклонением яркости ниже порога считаются однотонными
+FLAT_STDDEV = 2.0
+
+
+def dedup_available() -> bool:
+    return Image is not None
+
+
+def image_signature(path: pathlib.Path) -> tuple[int, float] | str:
+    """
+    Подпись PNG для сравнения: (dHash, пропорции ширина / высота) или, для почти однотонного
+    изображения, SHA-256 его размера и пикселей. dHash однотонного изображения состоит из нулей
+    (сплошь черная и сплошь белая секции дали бы один хэш), поэтому такие изображения
+    объединяются только при точном совпадении пикселей.
+    """
+    with Image.open(path) as image:
+        gray = image.convert("L")
+        if ImageStat.Stat(gray).stddev[0] < FLAT_STDDEV:
+            pixels = image.convert("RGBA")
+            return hashlib.sha256(f"{pixels.width}x{pixels.height}:".encode("ascii") + pixels.tobytes()).hexdigest()
+        return dhash(gray), image.width / max(image.height, 1)
+
+
+def dhash(gray: "Image.Image") -> int:
+    """
+    Difference hash: изображение в оттенках серого сжимается до 9x8, каждый бит — «левый пиксель
+    ярче правого». Хэш не зависит от масштаба рендера и мелких отличий сглаживания.
+    """
+    pixels = list(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_distance(a: int, b: int) -> int:
+    """Расстояние Хэмминга между хэшами."""
+    return bin(a ^ b).count("1")
+
+
+def cluster_images(paths: list[pathlib.Path], threshold: int) -> list[list[int]]:
+    """
+    Группирует почти одинаковые изображения. Возвращает кластеры индексов paths в исходном порядке;
+    первый индекс кластера — представитель, с хэшем которого сравниваются остальные.
+    Изображения, которые не удалось прочитать, остаются в отдельных кластерах.
+    """
+    clusters: list[list[int]] = []
+    representatives: list[tuple[int, float] | str | None] = []
+    for index, path in enumerate(paths):
+        try:
+            signature = image_signature(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not hash {path}: {e}")
+            signature = None
+        for cluster, rep_signature in zip(clusters, representatives):
+            if signature is not None and rep_signature is not None and _similar(signature, rep_signature, threshold):
+                cluster.append(index)
+                break
+        else:
+            clusters.append([index])
+            representatives.append(signature)
+    return clusters
+
+
+def _similar(a: tuple[int, float] | str, b: tuple[int, float] | str, threshold: int) -> bool:
+    if isinstance(a, str) or isinstance(b, str): # Однотонные изображения: только точное совпадение
+        return a == b
+    (hash_a, aspect_a), (hash_b, aspect_b) = a, b
+    if abs(aspect_a - aspect_b) > ASPECT_TOLERANCE * max(aspect_a, aspect_b):
+        return False
+    return hash_distance(hash_a, hash_b) <= threshold
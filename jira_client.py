@@ -2,29 +2,61 @@ import requests
 import base64
 from logger_setup import setup_logger # Import the setup function
 import pathlib
+import threading
+from http_cassette import Cassette, mount_cassette
+from multipart_stream import MultipartFileStream
 
 logger = setup_logger(__name__) # Use the setup function
 
+def build_issue_fields(project_key: str, summary: str, description: str,
+                       issue_type: str, xray_steps_field: str, steps_data: list, labels: list[str],
+                       custom_field_test_repository_path_id: str | None = None,
+                       test_repository_path_value: str | None = None,
+                       custom_field_test_case_type_id: str | None = None,
+                       test_case_type_value: str | None = None) -> dict:
+    """Builds the "fields" payload of a Test issue; shared by JiraClient and AsyncJiraClient."""
+    fields = {
+        "project": {"key": project_key},
+        "summary": summary,
+        "description": description,
+        "issuetype": {"name": issue_type},
+        "labels": labels,
+        xray_steps_field: {"steps": steps_data}
+    }
+
+    if custom_field_test_repository_path_id and test_repository_path_value is not None:
+        fields[custom_field_test_repository_path_id] = test_repository_path_value
+
+    if custom_field_test_case_type_id and test_case_type_value is not None:
+        fields[custom_field_test_case_type_id] = {"value": test_case_type_value}
+    return fields
+
 class JiraClient:
-    def __init__(self, base_url: str, username: str, password: str):
+    def __init__(self, base_url: str, username: str, password: str, cassette: Cassette | None = None):
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        mount_cassette(self.session, cassette)
+        self.bytes_uploaded = 0 # Attachment request body bytes sent by attach_files
+        self._bytes_lock = threading.Lock()
         auth_token = base64.b64encode(f"{username}:{password}".encode()).decode()
         self.session.headers.update({"Authorization": f"Basic {auth_token}"})
 
-    def _request(self, method: str, endpoint: str, json_data: dict | None = None, files: dict | None = None) -> requests.Response:
+    def _request(self, method: str, endpoint: str, json_data: dict | None = None, files: dict | None = None,
+                 data: MultipartFileStream | None = None) -> requests.Response:
         url = f"{self.base_url}{endpoint}"
         headers = {} # Per-request headers
         if json_data:
             headers["Content-Type"] = "application/json"
-        if files:
+        if files or data is not None:
             headers["X-Atlassian-Token"] = "no-check"
+        if data is not None:
+            headers["Content-Type"] = data.content_type
         
         final_headers = self.session.headers.copy()
         final_headers.update(headers)
 
         try:
-            response = self.session.request(method, url, json=json_data, files=files, headers=final_headers)
+            response = self.session.request(method, url, json=json_data, files=files, data=data, headers=final_headers)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
@@ -39,25 +71,53 @@ class JiraClient:
                      test_repository_path_value: str | None = None,
                      custom_field_test_case_type_id: str | None = None, 
                      test_case_type_value: str | None = None) -> dict:
-        fields = {
-            "project": {"key": project_key},
-            "summary": summary,
-            "description": description,
-            "issuetype": {"name": issue_type},
-            "labels": labels,
-            xray_steps_field: {"steps": steps_data}
-        }
-
-        if custom_field_test_repository_path_id and test_repository_path_value is not None:
-            fields[custom_field_test_repository_path_id] = test_repository_path_value
-        
-        if custom_field_test_case_type_id and test_case_type_value is not None:
-            fields[custom_field_test_case_type_id] = {"value": test_case_type_value}
-            
+        fields = build_issue_fields(
+            project_key, summary, description, issue_type, xray_steps_field, steps_data, labels,
+            custom_field_test_repository_path_id, test_repository_path_value,
+            custom_field_test_case_type_id, test_case_type_value
+        )
         response = self._request("POST", "/rest/api/2/issue", json_data={"fields": fields})
         return response.json()
 
+    def get_create_meta(self, project_key: str, issue_type: str) -> dict[str, dict] | None:
+        """
+        Fields of the create screen for the issue type, keyed by field id; None if the project has no such issue type.
+        Uses the legacy expand call and falls back to the paginated endpoints that replace it in Jira 9+.
+        """
+        response = self.session.get(
+            f"{self.base_url}/rest/api/2/issue/createmeta",
+            params={"projectKeys": project_key, "issuetypeNames": issue_type, "expand": "projects.issuetypes.fields"}
+        )
+        if response.status_code != 404:
+            response.raise_for_status()
+            for project in response.json().get("projects", []):
+                for project_issue_type in project.get("issuetypes", []):
+                    if project_issue_type.get("name") == issue_type:
+                        return project_issue_type.get("fields", {})
+            return None
+
+        issue_types = self._request("GET", f"/rest/api/2/issue/createmeta/{project_key}/issuetypes?maxResults=200").json()
+        type_id = next((t["id"] for t in issue_types.get("values", []) if t.get("name") == issue_type), None)
+        if type_id is None:
+            return None
+        fields = {}
+        start_at = 0
+        while True:
+            page = self._request(
+                "GET", f"/rest/api/2/issue/createmeta/{project_key}/issuetypes/{type_id}?startAt={start_at}&maxResults=100"
+            ).json()
+            values = page.get("values", [])
+            fields.update({field["fieldId"]: field for field in values})
+            start_at += len(values)
+            if not values or page.get("isLast", True) or start_at >= page.get("total", 0):
+                return fields
+
+    def attach_files(self, issue_key: str, file_paths: list[pathlib.Path], content_type: str = "image/png") -> None:
+        """Uploads all files to the issue in one multipart request, streaming them from disk."""
+        body = MultipartFileStream([(path.name, path, content_type) for path in file_paths])
+        self._request("POST", f"/rest/api/2/issue/{issue_key}/attachments", data=body)
+        with self._bytes_lock:
+            self.bytes_uploaded += len(body)
+
     def attach_file(self, issue_key: str, file_path: pathlib.Path) -> None:
-        with file_path.open("rb") as fh:
-            files_data = {"file": (file_path.name, fh, "image/png")}
-            self._request("POST", f"/rest/api/2/issue/{issue_key}/attachments", files=files_data) 
\ No newline at end of file
+        self.attach_files(issue_key, [file_path])
@@ -0,0 +1,137 @@
+import json
+import os
+import time
+from collections import defaultdict
+
+import requests
+
+from logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Сколько строк с одной и той же проблемой перечислять в сводке
+EXAMPLES_PER_PROBLEM = 3
+# Jira не принимает метки с пробелами и длиннее 255 символов
+MAX_LABEL_LENGTH = 255
+
+
+def load_create_meta(jira_client, project_key: str, issue_type: str,
+                     cache_path: str | os.PathLike, ttl_seconds: float) -> dict[str, dict] | None:
+    """
+    Поля экрана создания задачи (createmeta) для проекта и типа задачи; None, если такого типа задачи
+    в проекте нет. Ответ кэшируется на диске на ttl_seconds, ключ кэша — адрес Jira, проект и тип задачи.
+    """
+    cache_path = os.fspath(cache_path)
+    cache_key = f"{jira_client.base_url}|{project_key}|{issue_type}"
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        entries = {}
+
+    entry = entries.get(cache_key)
+    if entry and time.time() - entry.get("fetched_at", 0) < ttl_seconds:
+        return entry["fields"]
+
+    fields = jira_client.get_create_meta(project_key, issue_type)
+    if fields is None:
+        return None
+    entries[cache_key] = {"fetched_at": time.time(), "fields": fields}
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, cache_path)
+    return fields
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _option_value(value) -> str | None:
+    if isinstance(value, dict):
+        return value.get("value") or value.get("name") or value.get("id")
+    return value
+
+
+def _allowed_option(option: dict) -> set[str]:
+    return {str(option[key]) for key in ("value", "name", "id") if option.get(key) is not None}
+
+
+class PayloadValidator:
+    """Проверяет поля задачи (как для POST /rest/api/2/issue) по createmeta без запросов к Jira."""
+
+    def __init__(self, fields_meta: dict[str, dict]):
+        self.fields_meta = fields_meta
+
+    def validate(self, fields: dict) -> list[str]:
+        problems = []
+        for field_id, meta in self.fields_meta.items():
+            if meta.get("required") and not meta.get("hasDefaultValue") and _is_empty(fields.get(field_id)):
+                problems.append(f"required field {self._name(field_id)} is empty")
+
+        for field_id, value in fields.items():
+            meta = self.fields_meta.get(field_id)
+            if meta is None:
+                problems.append(f"field {field_id} is not on the create screen (wrong custom field ID?)")
+                continue
+            if field_id == "labels":
+                problems.extend(self._label_problems(value))
+            elif meta.get("allowedValues") and field_id not in ("project", "issuetype"):
+                problems.extend(self._option_problems(field_id, meta, value))
+        return problems
+
+    def _name(self, field_id: str) -> str:
+        name = self.fields_meta.get(field_id, {}).get("name")
+        return f"{field_id} ({name})" if name and name != field_id else field_id
+
+    def _label_problems(self, labels) -> list[str]:
+        problems = []
+        for label in labels or []:
+            if not label or any(ch.isspace() for ch in label):
+                problems.append(f"label '{label}' is empty or contains whitespace")
+            elif len(label) > MAX_LABEL_LENGTH:
+                problems.append(f"label '{label[:40]}...' is longer than {MAX_LABEL_LENGTH} characters")
+        return problems
+
+    def _option_problems(self, field_id: str, meta: dict, value) -> list[str]:
+        allowed = set().union(*(_allowed_option(option) for option in meta["allowedValues"]))
+        values = value if isinstance(value, list) else [value]
+        return [
+            f"value '{_option_value(item)}' is not allowed in {self._name(field_id)} "
+            f"(allowed: {', '.join(sorted(str(option.get('value') or option.get('name')) for option in meta['allowedValues']))})"
+            for item in values if str(_option_value(item)) not in allowed
+        ]
+
+
+def validate_payloads(validator: PayloadValidator, payloads: list[tuple[str, dict]]) -> list[str]:
+    """
+    Проверяет все задачи (подпись строки, поля) и возвращает сводку: одна строка на проблему
+    с числом и примерами затронутых задач. Пустой список — проверка пройдена.
+    """
+    rows_by_problem = defaultdict(list)
+    for row_label, fields in payloads:
+        for problem in validator.validate(fields):
+            rows_by_problem[problem].append(row_label)
+    summary = []
+    for problem, rows in rows_by_problem.items():
+        examples = ", ".join(rows[:EXAMPLES_PER_PROBLEM]) + (", ..." if len(rows) > EXAMPLES_PER_PROBLEM else "")
+        summary.append(f"{problem}: {len(rows)} issue(s), e.g. {examples}")
+    return summary
+
+
+def preflight(jira_client, project_key: str, issue_type: str, payloads: list[tuple[str, dict]],
+              cache_path: str | os.PathLike, ttl_seconds: float) -> list[str] | None:
+    """
+    Загружает createmeta (из кэша, если он свежий) и проверяет все задачи. Возвращает сводку проблем
+    или None, если метаданные получить не удалось и проверка пропущена.
+    """
+    try:
+        fields_meta = load_create_meta(jira_client, project_key, issue_type, cache_path, ttl_seconds)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"⚠️ Could not fetch createmeta from Jira, payload preflight is skipped: {e}")
+        return None
+    if fields_meta is None:
+        return [f"issue type '{issue_type}' cannot be created in project {project_key} (not in createmeta)"]
+    return validate_payloads(PayloadValidator(fields_meta), payloads)
@@ -0,0 +1,84 @@
+import io
+import pathlib
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartFileStream:
+    """
+    Тело multipart/form-data, которое читается с диска по частям.
+
+    requests получает длину через __len__ (выставляет Content-Length) и отправляет тело
+    блоками через read(), поэтому файлы не загружаются в память целиком. Несколько файлов
+    передаются одним запросом как несколько частей с одинаковым именем поля.
+
+    Тело можно прочитать повторно: seek() перематывает его (так requests и urllib3 пересылают
+    тело при редиректе или повторе запроса), а каждый вызов chunks() читает файлы заново.
+    """
+
+    def __init__(self, files: list[tuple[str, pathlib.Path, str]], field_name: str = "file"):
+        self.boundary = uuid.uuid4().hex
+        self._parts: list[bytes | pathlib.Path] = []
+        for filename, path, content_type in files:
+            self._parts.append(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n".encode("utf-8")
+            )
+            self._parts.append(path)
+            self._parts.append(b"\r\n")
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self._length = sum(len(part) if isinstance(part, bytes) else part.stat().st_size for part in self._parts)
+        self._chunks = self.chunks()
+        self._buffer = b""
+        self._position = 0
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        return self.chunks()
+
+    def chunks(self):
+        """Тело целиком как последовательность блоков (для клиентов, принимающих итератор)."""
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            with part.open("rb") as fh:
+                while chunk := fh.read(CHUNK_SIZE):
+                    yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._position += len(data)
+        return data
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Переходит к позиции offset: файлы открываются заново, тело дочитывается до нужной позиции."""
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._length
+        self._chunks = self.chunks()
+        self._buffer = b""
+        self._position = 0
+        while self._position < offset and self.read(min(CHUNK_SIZE, offset - self._position)):
+            pass
+        return self._position
@@ -0,0 +1,155 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+# Сигнал конца потока элементов между стадиями
+_DONE = object()
+# Как часто заблокированные потоки проверяют, не остановлен ли конвейер
+_POLL_SECONDS = 0.1
+
+
+class Stage(NamedTuple):
+    """Стадия конвейера: func применяется к каждому элементу в workers потоках."""
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+class StageStats:
+    """Счётчики стадии: обработано элементов, время работы и время ожидания места в следующей очереди."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, busy: float, blocked: float) -> None:
+        with self._lock:
+            self.items += 1
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+
+
+class Pipeline:
+    """
+    Потоковый конвейер: стадии соединены ограниченными очередями (queue_size), у каждой стадии
+    свой пул потоков. Когда очередь заполнена, предыдущая стадия ждёт, так что быстрые стадии
+    не уходят далеко вперёд медленных. При ordered=True run() отдаёт результаты в порядке входных
+    элементов, иначе — по мере готовности. Исключение в любой стадии останавливает конвейер
+    и пробрасывается из run().
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 4, ordered: bool = True):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self.stats = {stage.name: StageStats(stage.workers) for stage in stages}
+        self._stop = threading.Event()
+        self._error: BaseException | None = None
+
+    def run(self, items: Iterable) -> Iterator:
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), name="pipeline-feed", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining, remaining_lock = [stage.workers], threading.Lock()
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[index], queues[index + 1], remaining, remaining_lock),
+                    name=f"pipeline-{stage.name}-{worker}", daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+        try:
+            yield from self._collect(queues[-1])
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name} x{stats.workers}: {stats.items} item(s), {stats.busy_seconds:.1f}s busy, "
+            f"{stats.blocked_seconds:.1f}s waiting downstream"
+            for name, stats in self.stats.items()
+        )
+
+    def _put(self, out_queue: queue.Queue, value) -> bool:
+        while not self._stop.is_set():
+            try:
+                out_queue.put(value, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, in_queue: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return in_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _feed(self, items: Iterable, out_queue: queue.Queue) -> None:
+        try:
+            for seq, item in enumerate(items):
+                if not self._put(out_queue, (seq, item)):
+                    return
+        except BaseException as e:
+            self._fail(e)
+            return
+        self._put(out_queue, _DONE)
+
+    def _work(self, stage: Stage, in_queue: queue.Queue, out_queue: queue.Queue,
+              remaining: list[int], remaining_lock: threading.Lock) -> None:
+        stats = self.stats[stage.name]
+        while True:
+            entry = self._get(in_queue)
+            if entry is _DONE:
+                break
+            seq, item = entry
+            started = time.monotonic()
+            try:
+                result = stage.func(item)
+            except BaseException as e:
+                self._fail(e)
+                return
+            finished = time.monotonic()
+            if not self._put(out_queue, (seq, result)):
+                return
+            stats.add(finished - started, time.monotonic() - finished)
+        if self._stop.is_set():
+            return
+        # Сигнал конца возвращается в очередь для остальных потоков стадии; последний передаёт его дальше
+        self._put(in_queue, _DONE)
+        with remaining_lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            self._put(out_queue, _DONE)
+
+    def _collect(self, in_queue: queue.Queue) -> Iterator:
+        pending = {}
+        next_seq = 0
+        while True:
+            entry = self._get(in_queue)
+            if entry is _DONE:
+                return
+            seq, result = entry
+            if not self.ordered:
+                yield result
+                continue
+            pending[seq] = result
+            while next_seq in pending:
+                yield pending.pop(next_seq)
+                next_seq += 1
@@ -0,0 +1,95 @@
+import math
+import threading
+from collections import defaultdict
+
+# Масштабы округляются вниз до этого шага, чтобы узлы с близкими размерами попадали в один пакетный рендер
+SCALE_STEP = 0.25
+# Допустимый диапазон масштаба в Figma Images API
+FIGMA_MIN_API_SCALE = 0.01
+FIGMA_MAX_API_SCALE = 4
+
+
+def node_box_pixels(box: dict | None) -> float:
+    """Площадь узла в пикселях при масштабе 1 по absoluteBoundingBox (0, если размеров нет)."""
+    if not box or box.get("width") is None or box.get("height") is None:
+        return 0.0
+    return float(box["width"] * box["height"])
+
+
+class RenderPolicy:
+    """
+    Выбирает масштаб рендера для каждого узла так, чтобы PNG не превышал max_pixels пикселей:
+    большие экраны рендерятся мельче, мелкие элементы — до max_scale. Без max_pixels
+    все узлы рендерятся в default_scale, как раньше. Также ведёт учёт скачанных байт, выбранных масштабов
+    и пикселей: сколько их рендерится в выбранных масштабах и сколько было бы в default_scale.
+    """
+
+    def __init__(self, default_scale: float, max_pixels: int | None = None,
+                 min_scale: float = 0.5, max_scale: float | None = None):
+        self.default_scale = default_scale
+        self.max_pixels = max_pixels
+        self.min_scale = min_scale
+        self.max_scale = max_scale if max_scale is not None else default_scale
+        self.bytes_written = 0
+        self.scale_counts: dict[float, int] = defaultdict(int)
+        self.rendered_count = 0
+        self.failed_count = 0
+        self.pixels_rendered = 0.0
+        self.pixels_at_default_scale = 0.0
+        self._lock = threading.Lock()
+
+    def choose_scale(self, box: dict | None) -> float:
+        area = node_box_pixels(box)
+        if not self.max_pixels or not area:
+            return self.default_scale
+        scale = math.sqrt(self.max_pixels / area)
+        scale = min(scale, self.max_scale)
+        if scale >= SCALE_STEP:
+            scale = math.floor(scale / SCALE_STEP) * SCALE_STEP
+        scale = max(scale, self.min_scale)
+        return round(min(max(scale, FIGMA_MIN_API_SCALE), FIGMA_MAX_API_SCALE), 2)
+
+    def group_by_scale(self, nodes: list[tuple[str, dict | None]]) -> dict[float, list[str]]:
+        """
+        Группирует id узлов по выбранному масштабу: одна группа — один пакетный запрос рендера.
+        Пиксели узлов (по absoluteBoundingBox) учитываются в выбранном масштабе и в default_scale.
+        """
+        groups: dict[float, list[str]] = defaultdict(list)
+        pixels = pixels_at_default = 0.0
+        for node_id, box in nodes:
+            scale = self.choose_scale(box)
+            groups[scale].append(node_id)
+            area = node_box_pixels(box)
+            pixels += area * scale ** 2
+            pixels_at_default += area * self.default_scale ** 2
+        with self._lock:
+            self.pixels_rendered += pixels
+            self.pixels_at_default_scale += pixels_at_default
+        return dict(groups)
+
+    def record(self, scale: float, size_bytes: int) -> None:
+        """Учитывает скачанный PNG: его размер и масштаб, в котором он отрендерен."""
+        with self._lock: # PNG downloads may run in several threads (PIPELINE_ENABLED)
+            self.rendered_count += 1
+            self.bytes_written += size_bytes
+            self.scale_counts[scale] += 1
+
+    def record_failure(self, node_count: int = 1) -> None:
+        """Учитывает узлы, PNG которых получить не удалось (ошибка загрузки узлов, рендера или скачивания)."""
+        with self._lock:
+            self.failed_count += node_count
+
+    def summary(self) -> str:
+        """
+        Скачанные байты (измерены), пиксели в выбранных масштабах против default_scale (точно, по размерам
+        узлов) и число PNG по масштабам. Экономия в байтах не оценивается: размер PNG не пропорционален пикселям.
+        """
+        scales = ", ".join(f"{scale:g}x: {count}" for scale, count in sorted(self.scale_counts.items()))
+        failed = f", {self.failed_count} failed" if self.failed_count else ""
+        saved = self.pixels_at_default_scale - self.pixels_rendered
+        saved_text = (f"{saved / 1e6:.2f} MPx saved" if saved >= 0 else f"{-saved / 1e6:.2f} MPx more")
+        if self.pixels_at_default_scale:
+            saved_text += f" ({abs(saved) / self.pixels_at_default_scale:.0%})"
+        return (f"{self.rendered_count} PNG(s){failed}, {self.bytes_written / 1024:.1f} KiB downloaded; "
+                f"{self.pixels_rendered / 1e6:.2f} MPx rendered vs {self.pixels_at_default_scale / 1e6:.2f} MPx "
+                f"at scale {self.default_scale:g}x, {saved_text}; scales {scales or 'none'}")
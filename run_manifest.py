@@ -0,0 +1,87 @@
+import datetime
+import json
+import os
+import pathlib
+import threading
+import time
+import urllib.parse
+from typing import NamedTuple
+
+
+class IssueRecord(NamedTuple):
+    """Результат создания одной задачи: идентификатор источника, ключ (None — не создана) и время в секундах."""
+    source: str
+    key: str | None
+    seconds: float
+
+
+def jira_search_link(jira_url: str, jql: str) -> str:
+    return f"{jira_url.rstrip('/')}/issues/?jql={urllib.parse.quote(jql, safe='(),')}"
+
+
+class RunManifest:
+    """
+    Итог прогона: созданные задачи с идентификаторами источников и временем создания.
+    Ссылка на результат строится по метке прогона (runid_<RUN_ID>) и не зависит от числа задач;
+    ссылки со списками ключей (issuekey in (...)) строятся по частям и только по запросу.
+    """
+
+    def __init__(self, script: str, run_id: str, jira_url: str, project_key: str, run_label: str):
+        self.script = script
+        self.run_id = run_id
+        self.jira_url = jira_url
+        self.project_key = project_key
+        self.run_label = run_label
+        self.started_at = datetime.datetime.now().isoformat(timespec="seconds")
+        self._started = time.monotonic()
+        self.records: list[IssueRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: IssueRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    @property
+    def created_keys(self) -> list[str]:
+        return [record.key for record in self.records if record.key]
+
+    def label_jql(self) -> str:
+        return f'project = "{self.project_key}" AND labels = "{self.run_label}" ORDER BY key ASC'
+
+    def label_link(self) -> str:
+        return jira_search_link(self.jira_url, self.label_jql())
+
+    def key_links(self, keys_per_link: int) -> list[str]:
+        """Ссылки issuekey in (...) не более чем на keys_per_link ключей каждая."""
+        keys = self.created_keys
+        return [
+            jira_search_link(self.jira_url, "issuekey in (" + ", ".join(f'"{key}"' for key in keys[start:start + keys_per_link]) + ")")
+            for start in range(0, len(keys), keys_per_link)
+        ]
+
+    def to_dict(self, keys_per_link: int | None = None) -> dict:
+        manifest = {
+            "script": self.script,
+            "run_id": self.run_id,
+            "label": self.run_label,
+            "started_at": self.started_at,
+            "duration_seconds": round(time.monotonic() - self._started, 2),
+            "created": len(self.created_keys),
+            "failed": len(self.records) - len(self.created_keys),
+            "jql": self.label_jql(),
+            "link": self.label_link(),
+            # Компактная запись: [ключ или null, источник, секунды]
+            "issues": [[record.key, record.source, round(record.seconds, 3)] for record in self.records],
+        }
+        if keys_per_link:
+            manifest["key_links"] = self.key_links(keys_per_link)
+        return manifest
+
+    def write(self, path: str | os.PathLike, keys_per_link: int | None = None) -> pathlib.Path:
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(keys_per_link), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return path
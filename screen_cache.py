@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import threading
+
+
+def document_hash(document: dict | None) -> str | None:
+    """SHA-256 документа узла Figma (None, если документа нет — такой экран всегда рендерится заново)."""
+    if not document:
+        return None
+    return hashlib.sha256(json.dumps(document, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ScreenCache:
+    """
+    PNG экранов и их элементов между прогонами долгоживущего процесса (figma_watch_service.py).
+    Запись хранится по id экрана вместе с хэшем его документа: если документ не изменился,
+    экран не рендерится заново, а его PNG копируются в каталог нового прогона. Записи прогона
+    вступают в силу только после commit() (успешный прогон); discard() отбрасывает их.
+    С path записи сохраняются в JSON-файл при commit() и читаются из него при создании,
+    так что кэш переживает перезапуск сервиса.
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None):
+        self.path = path
+        self._entries: dict[str, tuple[str, dict[str, pathlib.Path]]] = self._load()
+        self._pending: dict[str, tuple[str, dict[str, pathlib.Path]]] = {}
+        self.reused: set[str] = set() # id экранов, взятых из кэша в текущем прогоне
+        self._lock = threading.Lock() # Экраны обрабатываются в нескольких потоках (PIPELINE_ENABLED)
+
+    def _load(self) -> dict[str, tuple[str, dict[str, pathlib.Path]]]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {screen_id: (digest, {node_id: pathlib.Path(path) for node_id, path in pngs.items()})
+                for screen_id, (digest, pngs) in data.items()}
+
+    def _save(self) -> None:
+        """Вызывается с захваченным self._lock."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {screen_id: [digest, {node_id: str(path) for node_id, path in pngs.items()}]
+                for screen_id, (digest, pngs) in self._entries.items()}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def reuse(self, screen_id: str, digest: str | None, out_dir: pathlib.Path) -> dict[str, pathlib.Path] | None:
+        """PNG экрана и его элементов (node_id -> путь в out_dir), если документ экрана не изменился, иначе None."""
+        with self._lock:
+            entry = self._entries.get(screen_id)
+        if digest is None or entry is None or entry[0] != digest:
+            return None
+        try:
+            pngs = {node_id: pathlib.Path(shutil.copyfile(path, out_dir / path.name)) for node_id, path in entry[1].items()}
+        except OSError: # PNG прошлого прогона удалены — экран рендерится заново
+            return None
+        with self._lock:
+            self._pending[screen_id] = (digest, pngs)
+            self.reused.add(screen_id)
+        return pngs
+
+    def store(self, screen_id: str, digest: str | None, pngs: dict[str, pathlib.Path]) -> None:
+        """Запоминает PNG отрендеренного экрана и его элементов до commit()."""
+        if digest is None:
+            return
+        with self._lock:
+            self._pending[screen_id] = (digest, dict(pngs))
+
+    def commit(self) -> None:
+        with self._lock:
+            self._entries.update(self._pending)
+            self._pending.clear()
+            self.reused.clear()
+            if self.path is not None:
+                self._save()
+
+    def discard(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self.reused.clear()
@@ -3,17 +3,31 @@
 import pathlib
 import requests # Keep for requests.exceptions used in some places
 from collections import defaultdict
-import urllib.parse
 import datetime # Add this import
 import uuid # Add this import
-import csv # Add this import
-import subprocess # Add this import
-import os # Add this import
+import argparse
+import time
+import asyncio
+import contextlib
+from typing import Iterator, NamedTuple
 
 from logger_setup import setup_logger # Import the setup function
 import config # Assuming config.py is in the same directory or PYTHONPATH
 from figma_client import FigmaClient, parse_file_key, sanitize # Import necessary items
-from jira_client import JiraClient # Import JiraClient
+from jira_client import JiraClient, build_issue_fields # Import JiraClient
+from jira_preflight import preflight
+from http_cassette import cassette_from_config
+from render_policy import RenderPolicy
+from screen_cache import ScreenCache, document_hash
+from image_dedup import cluster_images, dedup_available
+from async_http import httpx, async_available, HTTP2_AVAILABLE
+from async_figma_client import AsyncFigmaClient
+from async_jira_client import AsyncJiraClient
+from create_final_tests.create_final_promt import generate_prompt, PromptBuildError, TESTS_FROM_FIGMA_ARTIFACT
+from create_final_tests.build_cache import BuildCache
+from run_manifest import IssueRecord, RunManifest
+from exporters import EXPORT_FIELDS, EXPORTERS, TestCaseExporter, create_exporter
+from pipeline import Pipeline, Stage
 
 # -------- Logging Setup ---------------------------------------------------- #
 logger = setup_logger(__name__) # Use the setup function
@@ -22,6 +36,14 @@ logger = setup_logger(__name__) # Use the setup function
 FIGMA_FILE_URL = config.FIGMA_FILE_URL
 FIGMA_TOKEN = config.FIGMA_TOKEN # Used to init FigmaClient
 FIGMA_SCALE = config.FIGMA_SCALE
+# Pixel budget per rendered PNG; None keeps FIGMA_SCALE for every node
+FIGMA_MAX_PIXELS = getattr(config, "FIGMA_MAX_PIXELS", None)
+FIGMA_MIN_SCALE = getattr(config, "FIGMA_MIN_SCALE", 0.5)
+FIGMA_MAX_SCALE = getattr(config, "FIGMA_MAX_SCALE", FIGMA_SCALE)
+FIGMA_RENDER_BATCH_SIZE = getattr(config, "FIGMA_RENDER_BATCH_SIZE", 50) # Node ids per images request
+# Frame selection only needs pages and frame boxes; None fetches the whole document as before
+FIGMA_TREE_DEPTH = getattr(config, "FIGMA_TREE_DEPTH", None)
+FIGMA_NODES_BATCH_SIZE = getattr(config, "FIGMA_NODES_BATCH_SIZE", 20) # Frame ids per nodes request
 
 # === Jira Configuration (some might be directly used) ===
 JIRA_URL = config.JIRA_URL # Used to init JiraClient
@@ -35,6 +57,12 @@ XRAY_STEPS_FIELD = config.XRAY_STEPS_FIELD
 # Custom Field IDs from config
 CUSTOMFIELD_TEST_REPOSITORY_PATH = getattr(config, "CUSTOMFIELD_TEST_REPOSITORY_PATH", None)
 CUSTOMFIELD_TEST_CASE_TYPE = getattr(config, "CUSTOMFIELD_TEST_CASE_TYPE", None)
+TEST_CASE_TYPE = "component" # testCaseType of every generated test
+
+# Preflight: the issue payload is checked against Jira createmeta (cached on disk) before Figma is touched
+JIRA_PREFLIGHT_ENABLED = getattr(config, "JIRA_PREFLIGHT_ENABLED", True)
+JIRA_CREATEMETA_CACHE_PATH = getattr(config, "JIRA_CREATEMETA_CACHE_PATH", "create_final_tests/artifacts/.cache/jira_createmeta.json")
+JIRA_CREATEMETA_CACHE_TTL = getattr(config, "JIRA_CREATEMETA_CACHE_TTL", 24 * 60 * 60) # Seconds
 
 # ---------- Filtering Configuration ---------------------------------------- #
 FRAME_LIMIT = config.FRAME_LIMIT # Default to 1 if not in config, or set here
@@ -42,6 +70,9 @@ ELEMENT_BANNED = config.ELEMENT_BANNED
 ELEMENT_INCLUDE = config.ELEMENT_INCLUDE
 FRAME_BANNED = config.FRAME_BANNED
 FRAME_INCLUDE = config.FRAME_INCLUDE
+# Visually identical element renders (perceptual hash within the threshold) share one test
+ELEMENT_DEDUP_ENABLED = getattr(config, "ELEMENT_DEDUP_ENABLED", False)
+ELEMENT_DEDUP_THRESHOLD = getattr(config, "ELEMENT_DEDUP_THRESHOLD", 5) # Max differing bits of 64
 
 # ---------- Output Directory ----------------------------------------------- #
 RUN_ID = uuid.uuid4().hex[:8] # Generate a unique ID for this run
@@ -55,7 +86,28 @@ TEXT_EXPORT_FILENAME_TEMPLATE = getattr(config, "TEXT_EXPORT_FILENAME_TEMPLATE",
 TEXT_EXPORT_DEFAULT_PRIORITY = getattr(config, "TEXT_EXPORT_DEFAULT_PRIORITY", "Medium")
 TEXT_EXPORT_DEFAULT_BOARD = getattr(config, "TEXT_EXPORT_DEFAULT_BOARD", "Default Board")
 TEXT_EXPORT_CSV_DELIMITER = getattr(config, "TEXT_EXPORT_CSV_DELIMITER", ";")
+TEXT_EXPORT_FORMAT = getattr(config, "TEXT_EXPORT_FORMAT", "csv") # "csv", "jsonl" or "xray_json", see exporters.py
+TEXT_EXPORT_FLUSH_EVERY = getattr(config, "TEXT_EXPORT_FLUSH_EVERY", 50) # Rows between flushes of the partial export file
 TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE = getattr(config, "TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE", "")
+BUILD_CACHE_PATH = getattr(config, "BUILD_CACHE_PATH", "create_final_tests/artifacts/.cache/build_cache.json")
+
+# ---------- Run Results (JIRA_EXPORT) -------------------------------------- #
+# The result link selects the run label, so its size does not depend on the number of issues
+RESULT_MANIFEST_DIR = getattr(config, "RESULT_MANIFEST_DIR", "run_manifests")
+RESULT_KEY_LINKS = getattr(config, "RESULT_KEY_LINKS", False) # Also write issuekey in (...) links, split into chunks
+RESULT_KEYS_PER_LINK = getattr(config, "RESULT_KEYS_PER_LINK", 100)
+
+# ---------- Async Mode (httpx) --------------------------------------------- #
+ASYNC_MODE = getattr(config, "ASYNC_MODE", False) # Renders, downloads and Jira creates run concurrently from one thread
+ASYNC_MAX_CONNECTIONS = getattr(config, "ASYNC_MAX_CONNECTIONS", 100)
+ASYNC_PER_HOST_LIMIT = getattr(config, "ASYNC_PER_HOST_LIMIT", 20) # Max in-flight requests per host
+
+# ---------- Pipelined Mode (threads) --------------------------------------- #
+# Screens flow through discover -> render -> download -> export stages connected by bounded queues
+PIPELINE_ENABLED = getattr(config, "PIPELINE_ENABLED", False)
+PIPELINE_WORKERS = {"discover": 2, "render": 2, "download": 4, "export": 2, **getattr(config, "PIPELINE_WORKERS", {})}
+PIPELINE_QUEUE_SIZE = getattr(config, "PIPELINE_QUEUE_SIZE", 4) # Screens waiting between two stages
+PIPELINE_ORDERED = getattr(config, "PIPELINE_ORDERED", True) # Export in screen order rather than as screens finish
 
 # ---------- Figma File Key ------------------------------------------------- #
 try:
@@ -67,13 +119,15 @@ except ValueError as e:
 # --------------------------------------------------------------------------- #
 #                      DATA COLLECTION (FRAMES & ELEMENTS)                     #
 # --------------------------------------------------------------------------- #
-def _collect_top_frames(figma_client: FigmaClient, file_key: str, limit: int) -> list[tuple[str,str,str]]:
+def _collect_top_frames(figma_client: FigmaClient, file_key: str, limit: int) -> list[tuple[str,str,str,dict|None]]:
     try:
-        tree = figma_client.get_file_tree(file_key)
+        tree = figma_client.get_file_tree(file_key, depth=FIGMA_TREE_DEPTH)
     except requests.exceptions.RequestException:
         logger.error("❌ Failed to get Figma file tree. Aborting frame collection.")
         return []
+    return _select_top_frames(tree, limit)
 
+def _select_top_frames(tree: dict, limit: int) -> list[tuple[str,str,str,dict|None]]:
     dup_cnt = defaultdict(int)
     frames_data  = [] 
 
@@ -100,7 +154,7 @@ def _collect_top_frames(figma_client: FigmaClient, file_key: str, limit: int) ->
             
             node_id = node_dict["id"]
             current_area = get_node_area(node_dict)
-            frames_data.append((safe_name, node_id, raw_name, current_area))
+            frames_data.append((safe_name, node_id, raw_name, current_area, node_dict.get("absoluteBoundingBox")))
 
         for child_node in node_dict.get("children", []):
             walk_frames(child_node)
@@ -109,21 +163,32 @@ def _collect_top_frames(figma_client: FigmaClient, file_key: str, limit: int) ->
         walk_frames(page)
 
     frames_data.sort(key=lambda t: t[3], reverse=True) 
-    return [(f[0], f[1], f[2]) for f in frames_data[:limit]]
+    return [(f[0], f[1], f[2], f[4]) for f in frames_data[:limit]]
 
-def _collect_elements(figma_client: FigmaClient, file_key: str, frame_id: str) -> list[tuple[str,str,str]]:
-    try:
-        res = figma_client.get_nodes(file_key, ids=frame_id)
-    except requests.exceptions.RequestException:
-        logger.error(f"❌ Failed to get nodes for frame {frame_id}. Aborting element collection.")
-        return []
-        
-    root_node_data = res.get("nodes", {}).get(frame_id)
-    if not root_node_data or "document" not in root_node_data:
+def _fetch_frame_documents(figma_client: FigmaClient, file_key: str, frame_ids: list[str]) -> dict[str, dict]:
+    """
+    Fetches full subtrees of the selected frames with batched nodes calls.
+    Returns frame_id -> document node; frames from failed batches are missing.
+    """
+    documents = {}
+    for start in range(0, len(frame_ids), FIGMA_NODES_BATCH_SIZE):
+        batch = frame_ids[start:start + FIGMA_NODES_BATCH_SIZE]
+        try:
+            res = figma_client.get_nodes(file_key, ids=",".join(batch))
+        except requests.exceptions.RequestException:
+            logger.error(f"❌ Failed to get nodes for frames {', '.join(batch)}. Their elements will be skipped.")
+            continue
+        documents.update(_node_documents(res))
+    return documents
+
+def _node_documents(nodes_response: dict) -> dict[str, dict]:
+    return {node_id: node_data["document"] for node_id, node_data in (nodes_response.get("nodes") or {}).items()
+            if node_data and "document" in node_data}
+
+def _collect_elements(document_root: dict | None, frame_id: str) -> list[tuple[str,str,str,dict|None]]:
+    if not document_root:
         logger.warning(f"⚠️ No document data found for frame_id {frame_id}")
         return []
-    
-    document_root = root_node_data["document"]
 
     elements = []
     dup_cnt = defaultdict(int)
@@ -140,7 +205,7 @@ def _collect_elements(figma_client: FigmaClient, file_key: str, frame_id: str) -
                 clean_name = sanitize(raw_lower) # sanitize is from figma_client
                 dup_cnt[clean_name] += 1
                 safe_name = f"{dup_cnt[clean_name]:02d}_{clean_name}" if dup_cnt[clean_name] > 1 else clean_name
-                elements.append((safe_name, node_dict["id"], raw_name))
+                elements.append((safe_name, node_dict["id"], raw_name, node_dict.get("absoluteBoundingBox")))
 
         for child_node in node_dict.get("children", []):
             process_node_recursive(child_node)
@@ -153,334 +218,847 @@ def _collect_elements(figma_client: FigmaClient, file_key: str, frame_id: str) -
 # --------------------------------------------------------------------------- #
 #                            PNG RENDERING                                    #
 # --------------------------------------------------------------------------- #
-def _download_png(figma_client: FigmaClient, file_key: str, node_id: str, name: str, scale: float | int) -> pathlib.Path | None:
-    try:
-        image_url = figma_client.get_image_url(file_key, node_id, scale)
-        if not image_url:
-            logger.warning(f"⚠️ No image URL returned for node {node_id} ('{name}')")
-            return None
+def _render_pngs(figma_client: FigmaClient, file_key: str, nodes: list[tuple[str, str, dict | None]],
+                 render_policy: RenderPolicy) -> dict[str, pathlib.Path]:
+    """
+    Renders (node_id, name, absoluteBoundingBox) nodes to OUT_DIR/<name>.png.
+    Nodes that share a scale (chosen by render_policy) are rendered in batched images calls.
+    Returns node_id -> path for every node that was downloaded successfully.
+    """
+    names = {node_id: name for node_id, name, _ in nodes}
+    paths = {}
+    for scale, batch in _render_batches(nodes, render_policy):
+        try:
+            image_urls = figma_client.get_image_urls(file_key, batch, scale)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Failed to render {len(batch)} node(s) at scale {scale}: {e}")
+            render_policy.record_failure(len(batch))
+            continue
+        for node_id in batch:
+            path = _download_png(figma_client, image_urls.get(node_id), node_id, names[node_id], scale, render_policy)
+            if path:
+                paths[node_id] = path
+    return paths
+
+def _render_batches(nodes: list[tuple[str, str, dict | None]], render_policy: RenderPolicy) -> list[tuple[float, list[str]]]:
+    """Splits nodes into (scale, node ids) images calls of at most FIGMA_RENDER_BATCH_SIZE ids."""
+    batches = []
+    for scale, node_ids in render_policy.group_by_scale([(node_id, box) for node_id, _, box in nodes]).items():
+        for start in range(0, len(node_ids), FIGMA_RENDER_BATCH_SIZE):
+            batches.append((scale, node_ids[start:start + FIGMA_RENDER_BATCH_SIZE]))
+    return batches
 
-        image_data = figma_client.download_image_data(image_url)
+def _download_png(figma_client: FigmaClient, image_url: str | None, node_id: str, name: str,
+                  scale: float | int, render_policy: RenderPolicy) -> pathlib.Path | None:
+    if not image_url:
+        logger.warning(f"⚠️ No image URL returned for node {node_id} ('{name}')")
+        render_policy.record_failure()
+        return None
+    try:
         path = OUT_DIR / f"{name}.png"
-        path.write_bytes(image_data)
-        logger.info(f"✅ Successfully downloaded PNG for '{name}' to {path}")
+        size, sha256 = figma_client.download_image_to_file(image_url, path)
+        render_policy.record(scale, size)
+        logger.info(f"✅ Successfully downloaded PNG for '{name}' (scale {scale}, {size} bytes, sha256 {sha256[:12]}) to {path}")
         return path
     except requests.exceptions.RequestException as e: # Catch specific Figma client exceptions if defined, or general
         logger.error(f"❌ Failed to download PNG for node {node_id} ('{name}'): {e}")
+        render_policy.record_failure()
         return None
     except IOError as e:
         logger.error(f"❌ Failed to write PNG file for '{name}': {e}")
+        render_policy.record_failure()
         return None
 
+# --------------------------------------------------------------------------- #
+#                       ELEMENT DEDUPLICATION                                 #
+# --------------------------------------------------------------------------- #
+class ElementRender(NamedTuple):
+    screen_safe_name: str
+    screen_raw_name: str
+    elem_safe_name: str
+    elem_id: str
+    elem_raw_name: str
+    png_path: pathlib.Path
+
+def _cluster_element_renders(renders: list[ElementRender]) -> list[list[ElementRender]]:
+    """Groups visually identical element renders (ELEMENT_DEDUP_*). Without dedup every render is its own cluster."""
+    if not ELEMENT_DEDUP_ENABLED or not renders:
+        return [[render] for render in renders]
+    if not dedup_available():
+        logger.warning("⚠️ ELEMENT_DEDUP_ENABLED is set but Pillow is not installed; element dedup is skipped.")
+        return [[render] for render in renders]
+    clusters = [[renders[i] for i in cluster]
+                for cluster in cluster_images([render.png_path for render in renders], ELEMENT_DEDUP_THRESHOLD)]
+    logger.info(f"🧬 Element dedup: {len(renders)} render(s) grouped into {len(clusters)} test(s) "
+                f"(threshold {ELEMENT_DEDUP_THRESHOLD} bits).")
+    return clusters
+
+def _element_description(cluster: list[ElementRender]) -> str:
+    if len(cluster) == 1:
+        elem = cluster[0]
+        return f"*Figma:* [{elem.elem_raw_name}|{FIGMA_FILE_URL}&node-id={elem.elem_id}]"
+    links = "\n".join(f"* [{elem.screen_raw_name}. {elem.elem_raw_name}|{FIGMA_FILE_URL}&node-id={elem.elem_id}]"
+                      for elem in cluster)
+    return f"*Figma (визуально одинаковые элементы: {len(cluster)}):*\n{links}"
+
+# --------------------------------------------------------------------------- #
+#                                TEST CASES                                   #
+# --------------------------------------------------------------------------- #
+class TestSpec(NamedTuple):
+    test_case_id: str
+    summary: str
+    description: str
+    png_path: pathlib.Path
+    test_repository_path: str
+    test_case_type: str
+
+def _test_case_id(base_test_case_id: str) -> str:
+    if TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE:
+        return f"{TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE}_{base_test_case_id}"
+    return base_test_case_id
+
+def _collect_screen_elements(screens: list[tuple[str,str,str,dict|None]], frame_documents: dict[str, dict],
+                             screen_pngs: dict[str, pathlib.Path]) -> dict[str, list[tuple[str,str,str,dict|None]]]:
+    """Elements of every successfully rendered screen, keyed by screen id."""
+    elements_by_screen = {}
+    for screen_safe_name, screen_id, screen_raw_name, _ in screens:
+        logger.info(f"🖥️ Processing screen: «{screen_raw_name}» (ID: {screen_id})")
+        if screen_id not in screen_pngs:
+            logger.warning(f"⚠️ Skipping screen «{screen_raw_name}» due to PNG download failure.")
+            continue
+        elements = _collect_elements(frame_documents.get(screen_id), screen_id)
+        if not elements:
+            logger.info(f"  ℹ️ └─ No elements found for screen «{screen_raw_name}» matching filters.")
+        else:
+            logger.info(f"  🔍 Found {len(elements)} element(s) for screen «{screen_raw_name}».")
+        elements_by_screen[screen_id] = elements
+    return elements_by_screen
+
+def _element_render_nodes(screens: list[tuple[str,str,str,dict|None]],
+                          elements_by_screen: dict[str, list[tuple[str,str,str,dict|None]]]) -> list[tuple[str, str, dict | None]]:
+    # Element PNG names are prefixed with the screen to avoid overwrites if multiple elements have same sanitized name
+    return [(elem_id, f"{screen_safe_name}__{elem_safe_name}", elem_box)
+            for screen_safe_name, screen_id, _, _ in screens
+            for elem_safe_name, elem_id, _, elem_box in elements_by_screen.get(screen_id, [])]
+
+def _iter_test_specs(screens: list[tuple[str,str,str,dict|None]], screen_pngs: dict[str, pathlib.Path],
+                     elements_by_screen: dict[str, list[tuple[str,str,str,dict|None]]],
+                     element_pngs: dict[str, pathlib.Path]) -> Iterator[TestSpec]:
+    """Yields test cases in output order: each screen's layout test followed by its element tests."""
+    # Element tests are built once all renders are known, so visually identical ones can share a test
+    clusters_by_screen = _clusters_by_screen(_element_renders(screens, elements_by_screen, element_pngs))
+
+    for screen in screens:
+        _, screen_id, screen_raw_name, _ = screen
+        png_screen_path = screen_pngs.get(screen_id)
+        if not png_screen_path:
+            continue
+        yield _layout_test_spec(screen, png_screen_path)
+        for cluster in clusters_by_screen.get(screen[0], []):
+            yield _element_test_spec(cluster, screen_raw_name)
+
+def _element_renders(screens: list[tuple[str,str,str,dict|None]],
+                     elements_by_screen: dict[str, list[tuple[str,str,str,dict|None]]],
+                     element_pngs: dict[str, pathlib.Path]) -> list[ElementRender]:
+    element_renders = []
+    for screen_safe_name, screen_id, screen_raw_name, _ in screens:
+        for elem_safe_name, elem_id, elem_raw_name, _ in elements_by_screen.get(screen_id, []):
+            png_elem_path = element_pngs.get(elem_id)
+            if not png_elem_path:
+                logger.warning(f"    ⚠️ Skipping element «{elem_raw_name}» due to PNG download failure.")
+                continue
+            element_renders.append(ElementRender(screen_safe_name, screen_raw_name, elem_safe_name, elem_id, elem_raw_name, png_elem_path))
+    return element_renders
+
+def _clusters_by_screen(element_renders: list[ElementRender]) -> dict[str, list[list[ElementRender]]]:
+    """Element clusters keyed by the safe name of their representative's screen."""
+    clusters_by_screen = defaultdict(list)
+    for cluster in _cluster_element_renders(element_renders):
+        clusters_by_screen[cluster[0].screen_safe_name].append(cluster)
+    return clusters_by_screen
+
+def _layout_test_spec(screen: tuple[str,str,str,dict|None], png_screen_path: pathlib.Path) -> TestSpec:
+    screen_safe_name, screen_id, screen_raw_name, _ = screen
+    figma_link = f"{FIGMA_FILE_URL}&node-id={screen_id}"
+    return TestSpec(
+        _test_case_id(f"{screen_safe_name}_layout"),
+        f"{screen_raw_name} - компоновка",
+        f"*Figma:* [{screen_raw_name}|{figma_link}]",
+        png_screen_path,
+        screen_raw_name,
+        TEST_CASE_TYPE,
+    )
+
+def _element_test_spec(cluster: list[ElementRender], screen_raw_name: str) -> TestSpec:
+    elem = cluster[0] # The representative: its render is attached and its names are used
+    logger.info(f"  ✨ Processing element: «{elem.elem_raw_name}» (ID: {elem.elem_id}) on screen «{screen_raw_name}»")
+    return TestSpec(
+        _test_case_id(f"{elem.screen_safe_name}__{elem.elem_safe_name}_logic"),
+        f"{screen_raw_name}. {elem.elem_raw_name} - логика работы",
+        _element_description(cluster),
+        elem.png_path,
+        f"{screen_raw_name}/{elem.elem_raw_name}",
+        TEST_CASE_TYPE,
+    )
+
+def _test_spec_row(spec: TestSpec, labels_str: str) -> dict[str, str]:
+    """Export row keyed by EXPORT_FIELDS; Action repeats the summary as in Xray steps, PNGs are referenced by name in OUT_DIR."""
+    return dict(zip(EXPORT_FIELDS, [
+        spec.test_case_id, spec.summary, spec.description, TEXT_EXPORT_DEFAULT_PRIORITY, labels_str,
+        spec.summary, "", f"!{spec.png_path.name}|width=600!", TEXT_EXPORT_DEFAULT_BOARD,
+        spec.test_repository_path, spec.test_case_type
+    ]))
+
 # --------------------------------------------------------------------------- #
 #                               JIRA INTEGRATION                              #
 # --------------------------------------------------------------------------- #
-def _create_test_issue(jira_client: JiraClient, summary: str, description: str,
-                       png_path: pathlib.Path, project_key: str, issue_type_name: str, xray_custom_field: str,
-                       labels: list[str],
-                       test_repository_path: str | None = None,
-                       test_case_type: str | None = None) -> str | None:
-    steps = [{
+def _xray_steps(summary: str, png_path: pathlib.Path) -> list[dict]:
+    return [{
         "fields": {
             "Action": summary, 
             "Data": "", 
             "Expected Result": f"!{png_path.name}|width=600!" 
         }
     }]
-    
-    logger.info(f"📝 Attempting to create Jira issue with summary '{summary}' and labels: {labels}")
+
+def _preflight_jira(jira_client: JiraClient, labels: list[str]) -> bool:
+    """
+    Validates a payload shaped like every generated test (same fields, labels and testCaseType) against createmeta,
+    so a wrong custom field ID or option fails the run before any Figma request. False if problems were found.
+    """
+    logger.info("🔎 Validating the issue payload against Jira createmeta...")
+    sample_fields = build_issue_fields(
+        JIRA_PROJECT_KEY, "Preflight", "Preflight", ISSUE_TYPE, XRAY_STEPS_FIELD,
+        _xray_steps("Preflight", pathlib.Path("preflight.png")), labels,
+        CUSTOMFIELD_TEST_REPOSITORY_PATH, "Preflight", CUSTOMFIELD_TEST_CASE_TYPE, TEST_CASE_TYPE
+    )
+    problems = preflight(jira_client, JIRA_PROJECT_KEY, ISSUE_TYPE, [("all generated tests", sample_fields)],
+                         JIRA_CREATEMETA_CACHE_PATH, JIRA_CREATEMETA_CACHE_TTL)
+    if problems:
+        logger.critical(f"❌ Preflight found {len(problems)} problem(s) with the Jira configuration; no issues were created:")
+        for problem in problems:
+            logger.critical(f"   • {problem}")
+        return False
+    return True
+
+def _create_test_issue(jira_client: JiraClient, spec: TestSpec, labels: list[str]) -> IssueRecord:
+    """Creates the issue and attaches the PNG. The record's key is None if either step failed."""
+    logger.info(f"📝 Attempting to create Jira issue with summary '{spec.summary}' and labels: {labels}")
+    started = time.monotonic()
     try:
         created_issue = jira_client.create_issue(
-            project_key=project_key,
-            summary=summary,
-            description=description,
-            issue_type=issue_type_name,
-            xray_steps_field=xray_custom_field,
-            steps_data=steps,
+            project_key=JIRA_PROJECT_KEY,
+            summary=spec.summary,
+            description=spec.description,
+            issue_type=ISSUE_TYPE,
+            xray_steps_field=XRAY_STEPS_FIELD,
+            steps_data=_xray_steps(spec.summary, spec.png_path),
             labels=labels,
             custom_field_test_repository_path_id=CUSTOMFIELD_TEST_REPOSITORY_PATH,
-            test_repository_path_value=test_repository_path,
+            test_repository_path_value=spec.test_repository_path,
             custom_field_test_case_type_id=CUSTOMFIELD_TEST_CASE_TYPE,
-            test_case_type_value=test_case_type
+            test_case_type_value=spec.test_case_type
         )
         issue_key = created_issue["key"]
-        logger.info(f"✅ Successfully created Jira issue {issue_key}: {summary}")
+        logger.info(f"✅ Successfully created Jira issue {issue_key}: {spec.summary}")
         
-        jira_client.attach_file(issue_key, png_path)
-        logger.info(f"📎 Successfully attached {png_path.name} to {issue_key}")
-        return issue_key
+        jira_client.attach_files(issue_key, [spec.png_path])
+        logger.info(f"📎 Successfully attached {spec.png_path.name} to {issue_key}")
+        return IssueRecord(spec.test_case_id, issue_key, time.monotonic() - started)
         
     except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Failed to create Jira issue or attach file for summary '{summary}': {e}")
-        return None
+        logger.error(f"❌ Failed to create Jira issue or attach file for summary '{spec.summary}': {e}")
+        return IssueRecord(spec.test_case_id, None, time.monotonic() - started)
     except KeyError:
-        logger.error(f"❌ Failed to parse Jira response for summary '{summary}' (KeyError, likely 'key' missing from issue creation response)")
+        logger.error(f"❌ Failed to parse Jira response for summary '{spec.summary}' (KeyError, likely 'key' missing from issue creation response)")
+        return IssueRecord(spec.test_case_id, None, time.monotonic() - started)
+
+# --------------------------------------------------------------------------- #
+#                     PIPELINE (DISCOVER, RENDER, CREATE)                     #
+# --------------------------------------------------------------------------- #
+def _generate(figma_client: FigmaClient, jira_client: JiraClient | None, render_policy: RenderPolicy,
+              labels: list[str], exporter: TestCaseExporter | None,
+              screen_cache: ScreenCache | None = None) -> list[IssueRecord] | None:
+    """
+    Collects screens and elements and renders them screen by screen. As soon as a screen's elements are
+    rendered its test cases go to the exporter (FILE_EXPORT) or become Jira issues one request at a time.
+    With ELEMENT_DEDUP_ENABLED element tests need every render, so they are exported after all screens.
+    With a screen_cache, screens whose node document did not change since the last successful run reuse
+    their PNGs instead of being rendered, and in JIRA_EXPORT their issues (created by that run) are skipped.
+    Returns the Jira results in test order, None if no screens.
+    """
+    screens = _collect_top_frames(figma_client, FILE_KEY, FRAME_LIMIT)
+    logger.info(f"✅ Selected {len(screens)} screens for processing.")
+    if not screens:
+        logger.info("ℹ️ No screens selected based on current filters and limit. Exiting.")
         return None
 
-def _create_screen_test_issue(jira_client: JiraClient, screen_raw_name: str, node_id: str,
-                              png_path: pathlib.Path) -> str | None:
-    summary = f"{screen_raw_name} - компоновка"
-    figma_link = f"{FIGMA_FILE_URL}&node-id={node_id}"
-    description = f"*Figma:* [{screen_raw_name}|{figma_link}]"
-    final_labels = list(JIRA_LABELS) + [f"runid_{RUN_ID}"]
-    
-    test_repo_path_val = screen_raw_name
-    test_case_type_val = "component"
-    
-    return _create_test_issue(
-        jira_client, summary, description, png_path,
-        JIRA_PROJECT_KEY, ISSUE_TYPE, XRAY_STEPS_FIELD, final_labels,
-        test_repository_path=test_repo_path_val, test_case_type=test_case_type_val
+    frame_documents = _fetch_frame_documents(figma_client, FILE_KEY, [screen_id for _, screen_id, _, _ in screens])
+    render_policy.record_failure(len(screens) - len(frame_documents))
+    digests = {screen_id: document_hash(frame_documents.get(screen_id)) for _, screen_id, _, _ in screens}
+    reused_pngs = _reuse_screens(screen_cache, screens, digests)
+    screen_pngs = _render_pngs(
+        figma_client, FILE_KEY,
+        [(screen_id, screen_safe_name, screen_box) for screen_safe_name, screen_id, _, screen_box in screens
+         if screen_id not in reused_pngs],
+        render_policy
     )
+    screen_pngs.update({screen_id: pngs[screen_id] for screen_id, pngs in reused_pngs.items()})
+    elements_by_screen = _collect_screen_elements(screens, frame_documents, screen_pngs)
+
+    issue_records = []
+    def export(specs: list[TestSpec]) -> None:
+        for spec in specs:
+            if exporter:
+                exporter.write(_test_spec_row(spec, ",".join(labels)))
+            elif jira_client:
+                issue_records.append(_create_test_issue(jira_client, spec, labels))
+
+    element_pngs = {}
+    for screen in screens:
+        screen_id = screen[1]
+        if screen_id not in screen_pngs:
+            continue
+        if screen_id in reused_pngs:
+            pngs = reused_pngs[screen_id]
+        else:
+            pngs = _render_pngs(figma_client, FILE_KEY, _element_render_nodes([screen], elements_by_screen), render_policy)
+            _cache_screen(screen_cache, screen_id, digests[screen_id], elements_by_screen[screen_id],
+                          {screen_id: screen_pngs[screen_id], **pngs})
+        element_pngs.update(pngs)
+        if _issues_exist(screen_cache, jira_client, screen_id):
+            continue
+        if ELEMENT_DEDUP_ENABLED:
+            export([_layout_test_spec(screen, screen_pngs[screen_id])])
+        else:
+            export(list(_iter_test_specs([screen], screen_pngs, elements_by_screen, pngs)))
+    if ELEMENT_DEDUP_ENABLED:
+        skipped_screens = {screen_id for _, screen_id, _, _ in screens if _issues_exist(screen_cache, jira_client, screen_id)}
+        export(_dedup_element_specs(screens, elements_by_screen, element_pngs, skipped_screens))
+    return issue_records
 
-def _create_element_test_issue(jira_client: JiraClient, screen_raw_name: str, elem_raw_name: str,
-                               node_id: str, png_path: pathlib.Path) -> str | None:
-    summary = f"{screen_raw_name}. {elem_raw_name} - логика работы"
-    figma_link = f"{FIGMA_FILE_URL}&node-id={node_id}"
-    description = f"*Figma:* [{elem_raw_name}|{figma_link}]"
-    final_labels = list(JIRA_LABELS) + [f"runid_{RUN_ID}"]
+def _reuse_screens(screen_cache: ScreenCache | None, screens: list[tuple[str,str,str,dict|None]],
+                   digests: dict[str, str | None]) -> dict[str, dict[str, pathlib.Path]]:
+    """Renders of the screens that did not change since the last successful run: screen id -> node id -> PNG in OUT_DIR."""
+    if screen_cache is None:
+        return {}
+    reused = {}
+    for _, screen_id, screen_raw_name, _ in screens:
+        pngs = _reuse_screen(screen_cache, screen_id, screen_raw_name, digests.get(screen_id))
+        if pngs is not None:
+            reused[screen_id] = pngs
+    return reused
 
-    test_repo_path_val = f"{screen_raw_name}/{elem_raw_name}"
-    test_case_type_val = "component"
+def _reuse_screen(screen_cache: ScreenCache, screen_id: str, screen_raw_name: str,
+                  digest: str | None) -> dict[str, pathlib.Path] | None:
+    pngs = screen_cache.reuse(screen_id, digest, OUT_DIR)
+    if pngs is not None:
+        logger.info(f"♻️ Screen «{screen_raw_name}» is unchanged since the last run; its {len(pngs)} PNG(s) are reused.")
+    return pngs
 
-    return _create_test_issue(
-        jira_client, summary, description, png_path,
-        JIRA_PROJECT_KEY, ISSUE_TYPE, XRAY_STEPS_FIELD, final_labels,
-        test_repository_path=test_repo_path_val, test_case_type=test_case_type_val
-    )
+def _cache_screen(screen_cache: ScreenCache | None, screen_id: str, digest: str | None,
+                  elements: list[tuple[str,str,str,dict|None]], pngs: dict[str, pathlib.Path]) -> None:
+    """Keeps the renders for the next run, but only if the screen and all of its elements were rendered."""
+    if screen_cache and screen_id in pngs and all(elem_id in pngs for _, elem_id, _, _ in elements):
+        screen_cache.store(screen_id, digest, pngs)
+
+def _issues_exist(screen_cache: ScreenCache | None, jira_client, screen_id: str) -> bool:
+    """In JIRA_EXPORT the issues of a screen reused from the screen cache were created by an earlier run."""
+    return bool(jira_client and screen_cache and screen_id in screen_cache.reused)
+
+def _dedup_element_specs(screens: list[tuple[str,str,str,dict|None]],
+                         elements_by_screen: dict[str, list[tuple[str,str,str,dict|None]]],
+                         element_pngs: dict[str, pathlib.Path], skipped_screens: set[str] = frozenset()) -> list[TestSpec]:
+    """
+    Element tests of all screens, one per cluster of visually identical renders, in screen order.
+    Clusters whose renders all come from skipped_screens (screen ids) are left out.
+    """
+    screen_raw_names = {screen_safe_name: screen_raw_name for screen_safe_name, _, screen_raw_name, _ in screens}
+    skipped_names = {screen_safe_name for screen_safe_name, screen_id, _, _ in screens if screen_id in skipped_screens}
+    clusters_by_screen = _clusters_by_screen(_element_renders(screens, elements_by_screen, element_pngs))
+    return [_element_test_spec(cluster, screen_raw_names[screen_safe_name])
+            for screen_safe_name, _, _, _ in screens
+            for cluster in clusters_by_screen.get(screen_safe_name, [])
+            if not all(render.screen_safe_name in skipped_names for render in cluster)]
+
+class ScreenWork(NamedTuple):
+    screen: tuple[str, str, str, dict | None]
+    elements: list[tuple[str, str, str, dict | None]]
+    image_urls: dict[str, tuple[str, float, str | None]] # node_id -> (PNG name, scale, image URL)
+    pngs: dict[str, pathlib.Path] # node_id -> downloaded PNG, for the screen and its elements
+    digest: str | None = None # Hash of the screen's node document, for the screen cache
+
+def _generate_pipelined(figma_client: FigmaClient, jira_client: JiraClient | None, render_policy: RenderPolicy,
+                        labels: list[str], exporter: TestCaseExporter | None,
+                        screen_cache: ScreenCache | None = None) -> list[IssueRecord] | None:
+    """
+    Same result as _generate, but every screen moves through the discover, render, download and export
+    stages on its own, so one screen's Jira uploads overlap the next screen's nodes and renders.
+    With ELEMENT_DEDUP_ENABLED element tests need every render, so they are exported after all screens.
+    Screens reused from screen_cache skip the render and download stages, as in _generate.
+    """
+    screens = _collect_top_frames(figma_client, FILE_KEY, FRAME_LIMIT)
+    logger.info(f"✅ Selected {len(screens)} screens for processing.")
+    if not screens:
+        logger.info("ℹ️ No screens selected based on current filters and limit. Exiting.")
+        return None
+
+    def export(specs: list[TestSpec]) -> list:
+        if exporter:
+            return [_test_spec_row(spec, ",".join(labels)) for spec in specs]
+        if jira_client:
+            return [_create_test_issue(jira_client, spec, labels) for spec in specs]
+        return []
+
+    def export_screen(work: ScreenWork) -> tuple[ScreenWork, list]:
+        _, screen_id, _, _ = work.screen
+        if screen_id not in work.pngs or _issues_exist(screen_cache, jira_client, screen_id):
+            return work, []
+        if ELEMENT_DEDUP_ENABLED:
+            return work, export([_layout_test_spec(work.screen, work.pngs[screen_id])])
+        return work, export(list(_iter_test_specs([work.screen], work.pngs, {screen_id: work.elements}, work.pngs)))
+
+    pipeline = Pipeline([
+        Stage("discover", lambda screen: _discover_screen(figma_client, render_policy, screen_cache, screen),
+              PIPELINE_WORKERS["discover"]),
+        Stage("render", lambda work: _render_screen(figma_client, render_policy, work), PIPELINE_WORKERS["render"]),
+        Stage("download", lambda work: _download_screen(figma_client, render_policy, screen_cache, work),
+              PIPELINE_WORKERS["download"]),
+        Stage("export", export_screen, PIPELINE_WORKERS["export"]),
+    ], queue_size=PIPELINE_QUEUE_SIZE, ordered=PIPELINE_ORDERED)
+    logger.info(f"🧵 Pipelined mode: workers {PIPELINE_WORKERS}, queue size {PIPELINE_QUEUE_SIZE}, "
+                f"{'ordered' if PIPELINE_ORDERED else 'unordered'} output.")
+
+    issue_records = []
+    finished_screens = []
+    for work, outputs in pipeline.run(screens):
+        finished_screens.append(work)
+        for output in outputs:
+            if exporter:
+                exporter.write(output)
+            else:
+                issue_records.append(output)
+
+    if ELEMENT_DEDUP_ENABLED:
+        element_pngs = {node_id: path for work in finished_screens for node_id, path in work.pngs.items()}
+        elements_by_screen = {work.screen[1]: work.elements for work in finished_screens if work.screen[1] in work.pngs}
+        skipped_screens = {screen_id for _, screen_id, _, _ in screens if _issues_exist(screen_cache, jira_client, screen_id)}
+        element_specs = _dedup_element_specs(screens, elements_by_screen, element_pngs, skipped_screens)
+        element_export = Pipeline([Stage("export", lambda spec: export([spec]), PIPELINE_WORKERS["export"])],
+                                  queue_size=PIPELINE_QUEUE_SIZE, ordered=PIPELINE_ORDERED)
+        for outputs in element_export.run(element_specs):
+            for output in outputs:
+                if exporter:
+                    exporter.write(output)
+                else:
+                    issue_records.append(output)
+
+    logger.info(f"🧵 Pipeline stages: {pipeline.summary()}")
+    return issue_records
+
+def _discover_screen(figma_client: FigmaClient, render_policy: RenderPolicy, screen_cache: ScreenCache | None,
+                     screen: tuple[str,str,str,dict|None]) -> ScreenWork:
+    """Finds the screen's elements; a screen unchanged since the last run gets its cached PNGs right away."""
+    _, screen_id, screen_raw_name, _ = screen
+    logger.info(f"🖥️ Processing screen: «{screen_raw_name}» (ID: {screen_id})")
+    document = _fetch_frame_documents(figma_client, FILE_KEY, [screen_id]).get(screen_id)
+    if document is None:
+        render_policy.record_failure()
+    elements = _collect_elements(document, screen_id)
+    if not elements:
+        logger.info(f"  ℹ️ └─ No elements found for screen «{screen_raw_name}» matching filters.")
+    else:
+        logger.info(f"  🔍 Found {len(elements)} element(s) for screen «{screen_raw_name}».")
+    digest = document_hash(document)
+    pngs = _reuse_screen(screen_cache, screen_id, screen_raw_name, digest) if screen_cache else None
+    return ScreenWork(screen, elements, {}, pngs or {}, digest)
+
+def _render_screen(figma_client: FigmaClient, render_policy: RenderPolicy, work: ScreenWork) -> ScreenWork:
+    """Requests image URLs for the screen and its elements; nodes of failed images calls are left out."""
+    if work.pngs: # Reused from the screen cache
+        return work
+    screen_safe_name, screen_id, _, screen_box = work.screen
+    nodes = [(screen_id, screen_safe_name, screen_box)] + _element_render_nodes([work.screen], {screen_id: work.elements})
+    names = {node_id: name for node_id, name, _ in nodes}
+    image_urls = {}
+    for scale, batch in _render_batches(nodes, render_policy):
+        try:
+            urls = figma_client.get_image_urls(FILE_KEY, batch, scale)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"❌ Failed to render {len(batch)} node(s) at scale {scale}: {e}")
+            render_policy.record_failure(len(batch))
+            continue
+        image_urls.update({node_id: (names[node_id], scale, urls.get(node_id)) for node_id in batch})
+    return work._replace(image_urls=image_urls)
+
+def _download_screen(figma_client: FigmaClient, render_policy: RenderPolicy, screen_cache: ScreenCache | None,
+                     work: ScreenWork) -> ScreenWork:
+    if work.pngs: # Reused from the screen cache
+        return work
+    _, screen_id, screen_raw_name, _ = work.screen
+    screen_png = None
+    if screen_id in work.image_urls:
+        name, scale, image_url = work.image_urls[screen_id]
+        screen_png = _download_png(figma_client, image_url, screen_id, name, scale, render_policy)
+    if not screen_png: # Elements of a screen without a layout PNG are not exported
+        logger.warning(f"⚠️ Skipping screen «{screen_raw_name}» due to PNG download failure.")
+        return work
+    pngs = {screen_id: screen_png}
+    for node_id, (name, scale, image_url) in work.image_urls.items():
+        if node_id != screen_id:
+            path = _download_png(figma_client, image_url, node_id, name, scale, render_policy)
+            if path:
+                pngs[node_id] = path
+    _cache_screen(screen_cache, screen_id, work.digest, work.elements, pngs)
+    return work._replace(pngs=pngs)
+
+async def _generate_async(figma_client: AsyncFigmaClient, jira_client: AsyncJiraClient | None, render_policy: RenderPolicy,
+                          labels: list[str], exporter: TestCaseExporter | None) -> list[IssueRecord] | None:
+    """
+    Same steps as _generate, but renders, downloads and Jira creates are all in flight at once.
+    Each screen's test cases are exported as soon as it and the screens before it are rendered.
+    """
+    async with contextlib.AsyncExitStack() as stack:
+        await stack.enter_async_context(figma_client)
+        if jira_client:
+            await stack.enter_async_context(jira_client)
+
+        try:
+            tree = await figma_client.get_file_tree(FILE_KEY, depth=FIGMA_TREE_DEPTH)
+            screens = _select_top_frames(tree, FRAME_LIMIT)
+        except httpx.HTTPError:
+            logger.error("❌ Failed to get Figma file tree. Aborting frame collection.")
+            screens = []
+        logger.info(f"✅ Selected {len(screens)} screens for processing.")
+        if not screens:
+            logger.info("ℹ️ No screens selected based on current filters and limit. Exiting.")
+            return None
+
+        frame_documents, screen_pngs = await asyncio.gather(
+            _fetch_frame_documents_async(figma_client, FILE_KEY, [screen_id for _, screen_id, _, _ in screens]),
+            _render_pngs_async(
+                figma_client, FILE_KEY,
+                [(screen_id, screen_safe_name, screen_box) for screen_safe_name, screen_id, _, screen_box in screens],
+                render_policy
+            ),
+        )
+        render_policy.record_failure(len(screens) - len(frame_documents))
+        elements_by_screen = _collect_screen_elements(screens, frame_documents, screen_pngs)
+        rendered_screens = [screen for screen in screens if screen[1] in screen_pngs]
+        element_renders = [
+            asyncio.ensure_future(_render_pngs_async(
+                figma_client, FILE_KEY, _element_render_nodes([screen], elements_by_screen), render_policy
+            ))
+            for screen in rendered_screens
+        ]
+
+        issue_creates = []
+        def export(specs: list[TestSpec]) -> None:
+            for spec in specs:
+                if exporter:
+                    exporter.write(_test_spec_row(spec, ",".join(labels)))
+                elif jira_client:
+                    issue_creates.append(asyncio.ensure_future(_create_test_issue_async(jira_client, spec, labels)))
+
+        element_pngs = {}
+        # Screens are awaited in order, so rows keep the screen order while later screens are still rendering
+        for screen, element_render in zip(rendered_screens, element_renders):
+            pngs = await element_render
+            element_pngs.update(pngs)
+            if ELEMENT_DEDUP_ENABLED:
+                export([_layout_test_spec(screen, screen_pngs[screen[1]])])
+            else:
+                export(list(_iter_test_specs([screen], screen_pngs, elements_by_screen, pngs)))
+        if ELEMENT_DEDUP_ENABLED:
+            export(_dedup_element_specs(screens, elements_by_screen, element_pngs))
+        return list(await asyncio.gather(*issue_creates))
+
+async def _fetch_frame_documents_async(figma_client: AsyncFigmaClient, file_key: str, frame_ids: list[str]) -> dict[str, dict]:
+    async def fetch_batch(batch: list[str]) -> dict[str, dict]:
+        try:
+            return _node_documents(await figma_client.get_nodes(file_key, ids=",".join(batch)))
+        except httpx.HTTPError:
+            logger.error(f"❌ Failed to get nodes for frames {', '.join(batch)}. Their elements will be skipped.")
+            return {}
+
+    documents = {}
+    batches = [frame_ids[start:start + FIGMA_NODES_BATCH_SIZE] for start in range(0, len(frame_ids), FIGMA_NODES_BATCH_SIZE)]
+    for batch_documents in await asyncio.gather(*(fetch_batch(batch) for batch in batches)):
+        documents.update(batch_documents)
+    return documents
+
+async def _render_pngs_async(figma_client: AsyncFigmaClient, file_key: str, nodes: list[tuple[str, str, dict | None]],
+                             render_policy: RenderPolicy) -> dict[str, pathlib.Path]:
+    names = {node_id: name for node_id, name, _ in nodes}
+
+    async def render_batch(scale: float, batch: list[str]) -> dict[str, pathlib.Path]:
+        try:
+            image_urls = await figma_client.get_image_urls(file_key, batch, scale)
+        except httpx.HTTPError as e:
+            logger.error(f"❌ Failed to render {len(batch)} node(s) at scale {scale}: {e}")
+            render_policy.record_failure(len(batch))
+            return {}
+        paths = await asyncio.gather(*(
+            _download_png_async(figma_client, image_urls.get(node_id), node_id, names[node_id], scale, render_policy)
+            for node_id in batch
+        ))
+        return {node_id: path for node_id, path in zip(batch, paths) if path}
+
+    paths = {}
+    for batch_paths in await asyncio.gather(*(render_batch(scale, batch) for scale, batch in _render_batches(nodes, render_policy))):
+        paths.update(batch_paths)
+    return paths
+
+async def _download_png_async(figma_client: AsyncFigmaClient, image_url: str | None, node_id: str, name: str,
+                              scale: float | int, render_policy: RenderPolicy) -> pathlib.Path | None:
+    if not image_url:
+        logger.warning(f"⚠️ No image URL returned for node {node_id} ('{name}')")
+        render_policy.record_failure()
+        return None
+    try:
+        path = OUT_DIR / f"{name}.png"
+        size, sha256 = await figma_client.download_image_to_file(image_url, path)
+        render_policy.record(scale, size)
+        logger.info(f"✅ Successfully downloaded PNG for '{name}' (scale {scale}, {size} bytes, sha256 {sha256[:12]}) to {path}")
+        return path
+    except httpx.HTTPError as e:
+        logger.error(f"❌ Failed to download PNG for node {node_id} ('{name}'): {e}")
+        render_policy.record_failure()
+        return None
+    except IOError as e:
+        logger.error(f"❌ Failed to write PNG file for '{name}': {e}")
+        render_policy.record_failure()
+        return None
+
+async def _create_test_issue_async(jira_client: AsyncJiraClient, spec: TestSpec, labels: list[str]) -> IssueRecord:
+    logger.info(f"📝 Attempting to create Jira issue with summary '{spec.summary}' and labels: {labels}")
+    started = time.monotonic()
+    try:
+        created_issue = await jira_client.create_issue(
+            project_key=JIRA_PROJECT_KEY,
+            summary=spec.summary,
+            description=spec.description,
+            issue_type=ISSUE_TYPE,
+            xray_steps_field=XRAY_STEPS_FIELD,
+            steps_data=_xray_steps(spec.summary, spec.png_path),
+            labels=labels,
+            custom_field_test_repository_path_id=CUSTOMFIELD_TEST_REPOSITORY_PATH,
+            test_repository_path_value=spec.test_repository_path,
+            custom_field_test_case_type_id=CUSTOMFIELD_TEST_CASE_TYPE,
+            test_case_type_value=spec.test_case_type
+        )
+        issue_key = created_issue["key"]
+        logger.info(f"✅ Successfully created Jira issue {issue_key}: {spec.summary}")
+
+        await jira_client.attach_files(issue_key, [spec.png_path])
+        logger.info(f"📎 Successfully attached {spec.png_path.name} to {issue_key}")
+        return IssueRecord(spec.test_case_id, issue_key, time.monotonic() - started)
+
+    except httpx.HTTPError as e:
+        logger.error(f"❌ Failed to create Jira issue or attach file for summary '{spec.summary}': {e}")
+        return IssueRecord(spec.test_case_id, None, time.monotonic() - started)
+    except KeyError:
+        logger.error(f"❌ Failed to parse Jira response for summary '{spec.summary}' (KeyError, likely 'key' missing from issue creation response)")
+        return IssueRecord(spec.test_case_id, None, time.monotonic() - started)
+
+def _async_mode_available() -> bool:
+    if not async_available():
+        logger.warning("⚠️ ASYNC_MODE is set but httpx is not installed; running with the sync clients.")
+        return False
+    if getattr(config, "HTTP_CASSETTE_MODE", None):
+        logger.warning("⚠️ HTTP cassettes are recorded and replayed by the sync clients only; ASYNC_MODE is ignored.")
+        return False
+    return True
 
 # --------------------------------------------------------------------------- #
 #                                   MAIN ORCHESTRATION                        #
 # --------------------------------------------------------------------------- #
-def main():
+def _create_exporter(run_specific_label: str) -> TestCaseExporter:
+    file_path = pathlib.Path(TEXT_EXPORT_PATH) / TEXT_EXPORT_FILENAME_TEMPLATE.format(RUN_ID=RUN_ID)
+    # The prompt's tests_from_figma artifact is CSV; every format keeps a CSV copy of the rows in memory for it
+    options = {"flush_every": TEXT_EXPORT_FLUSH_EVERY, "hash_mask": (run_specific_label, "runid_*"),
+               "csv_copy_delimiter": TEXT_EXPORT_CSV_DELIMITER}
+    if TEXT_EXPORT_FORMAT == "csv":
+        options["delimiter"] = TEXT_EXPORT_CSV_DELIMITER
+    else:
+        # The filename template ends in .txt; other formats get their own extension
+        file_path = file_path.with_suffix(EXPORTERS[TEXT_EXPORT_FORMAT].extension)
+    if TEXT_EXPORT_FORMAT == "xray_json":
+        options.update(project_key=JIRA_PROJECT_KEY, test_case_type_field=CUSTOMFIELD_TEST_CASE_TYPE)
+    return create_exporter(TEXT_EXPORT_FORMAT, file_path, **options)
+
+def _write_run_results(manifest: RunManifest) -> None:
+    """Writes the run manifest and the link file, and logs the result link."""
+    keys_per_link = RESULT_KEYS_PER_LINK if RESULT_KEY_LINKS else None
+    manifest_path = pathlib.Path(RESULT_MANIFEST_DIR) / f"send_figma_tests_runid_{RUN_ID}.json"
+    try:
+        manifest.write(manifest_path, keys_per_link)
+        logger.info(f"🧾 Run manifest saved to: {manifest_path.resolve()}")
+    except IOError as e:
+        logger.error(f"❌ Failed to write run manifest to {manifest_path}: {e}")
+
+    if not manifest.created_keys:
+        logger.info("ℹ️ No Jira issues were created in this run.")
+        return
+    jira_link = manifest.label_link()
+    key_links = manifest.key_links(keys_per_link) if keys_per_link else []
+    link_file_path = OUT_DIR / f"jira_issues_run_{RUN_ID}.txt"
+    try:
+        with open(link_file_path, "w", encoding="utf-8") as f:
+            f.write("\n".join([jira_link] + key_links))
+        logger.info(f"🔗 Jira link saved to: {link_file_path.resolve()}")
+    except IOError as e:
+        logger.error(f"❌ Failed to write Jira link to file {link_file_path}: {e}")
+
+    logger.info(f"🔗 Link to the {len(manifest.created_keys)} created Jira issue(s):")
+    logger.info(jira_link)
+    if key_links:
+        logger.info(f"🔗 Issue key links ({len(key_links)}, up to {keys_per_link} keys each) are in {link_file_path.name}.")
+
+def start_run(file_url: str | None = None) -> str:
+    """
+    Starts a new run in a long-lived process (see figma_watch_service.py): a fresh RUN_ID and OUT_DIR,
+    optionally for another Figma file. Returns the new RUN_ID.
+    """
+    global RUN_ID, OUT_DIR, FIGMA_FILE_URL, FILE_KEY
+    if file_url is not None:
+        FILE_KEY = parse_file_key(file_url)
+        FIGMA_FILE_URL = file_url
+    RUN_ID = uuid.uuid4().hex[:8]
+    OUT_DIR = pathlib.Path(f"figma_screens/{RUN_ID}")
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    return RUN_ID
+
+def main(force: bool = False, figma_client: FigmaClient | None = None, jira_client: JiraClient | None = None,
+         screen_cache: ScreenCache | None = None) -> bool:
+    """
+    Runs one generation. Returns True only if every selected screen and element was rendered and all test cases
+    were exported: Jira issues created (JIRA_EXPORT), or the export file and the final prompt written (FILE_EXPORT).
+    screen_cache (see _generate) is used by the sync modes, which are the ones that run with warm clients.
+    """
     logger.info("🚀 Starting Figma to Jira test case generation process...")
     logger.info(f"📄 runid_{RUN_ID}")
-    
-    # Initialize API clients
-    figma_client = FigmaClient(token=FIGMA_TOKEN)
-    jira_client = None
+
+    if OPERATIONAL_MODE not in ("JIRA_EXPORT", "FILE_EXPORT"):
+        logger.critical(f"❌ Invalid OPERATIONAL_MODE: '{OPERATIONAL_MODE}'. Must be 'JIRA_EXPORT' or 'FILE_EXPORT'. Exiting.")
+        return False
+    if OPERATIONAL_MODE == "FILE_EXPORT" and TEXT_EXPORT_FORMAT not in EXPORTERS:
+        logger.critical(f"❌ Invalid TEXT_EXPORT_FORMAT: '{TEXT_EXPORT_FORMAT}'. Must be one of: {', '.join(EXPORTERS)}. Exiting.")
+        return False
+
+    # Warm clients passed in by a long-lived caller are always the sync ones
+    run_async = ASYNC_MODE and figma_client is None and jira_client is None and _async_mode_available()
+    if run_async:
+        figma_client = AsyncFigmaClient(FIGMA_TOKEN, ASYNC_MAX_CONNECTIONS, ASYNC_PER_HOST_LIMIT)
+        if OPERATIONAL_MODE == "JIRA_EXPORT":
+            jira_client = AsyncJiraClient(JIRA_URL, JIRA_USERNAME, JIRA_PASSWORD, ASYNC_MAX_CONNECTIONS, ASYNC_PER_HOST_LIMIT)
+        logger.info(f"⚡ Async mode: up to {ASYNC_PER_HOST_LIMIT} in-flight requests per host, "
+                    f"HTTP/2 {'enabled' if HTTP2_AVAILABLE else 'unavailable (install h2)'}.")
+    else:
+        # Initialize API clients unless warm ones are passed in (optionally recording or replaying HTTP traffic, see HTTP_CASSETTE_MODE)
+        cassette = None
+        if figma_client is None or (OPERATIONAL_MODE == "JIRA_EXPORT" and jira_client is None):
+            cassette = cassette_from_config(config)
+        if figma_client is None:
+            figma_client = FigmaClient(token=FIGMA_TOKEN, cassette=cassette)
+        if OPERATIONAL_MODE == "JIRA_EXPORT" and jira_client is None:
+            jira_client = JiraClient(base_url=JIRA_URL, username=JIRA_USERNAME, password=JIRA_PASSWORD, cassette=cassette)
     if OPERATIONAL_MODE == "JIRA_EXPORT":
         logger.info(f"⚙️ Operational mode: JIRA_EXPORT. Connecting to Jira instance: {JIRA_URL}")
-        jira_client = JiraClient(base_url=JIRA_URL, username=JIRA_USERNAME, password=JIRA_PASSWORD)
-    elif OPERATIONAL_MODE == "FILE_EXPORT":
-        logger.info(f"⚙️ Operational mode: FILE_EXPORT. Test cases will be saved to a TXT file.")
     else:
-        logger.critical(f"❌ Invalid OPERATIONAL_MODE: '{OPERATIONAL_MODE}'. Must be 'JIRA_EXPORT' or 'FILE_EXPORT'. Exiting.")
-        return
+        logger.info(f"⚙️ Operational mode: FILE_EXPORT. Test cases will be saved to a TXT file.")
 
     logger.info(f"📄 Processing Figma file: {FIGMA_FILE_URL} (Key: {FILE_KEY})")
-
-    screens = _collect_top_frames(figma_client, FILE_KEY, FRAME_LIMIT)
-    logger.info(f"✅ Selected {len(screens)} screens for processing.")
-
-    if not screens:
-        logger.info("ℹ️ No screens selected based on current filters and limit. Exiting.")
-        return
-
-    created_issues_keys = []
-    txt_export_data = []
-    txt_export_header = [
-        "TestCaseIdentifier", "Summary", "Description", "Priority", "Labels",
-        "Action", "Data", "ExpectedResult", "Board",
-        "testRepositoryPath", "testCaseType"
-    ]
+    # Warm clients keep counting across runs, so the transfer summary reports the difference
+    downloaded_before = figma_client.bytes_downloaded
+    uploaded_before = jira_client.bytes_uploaded if jira_client else 0
 
     # Common labels for both modes
     run_specific_label = f"runid_{RUN_ID}"
     common_labels_list = list(JIRA_LABELS) + [run_specific_label]
+    manifest = RunManifest("send_figma_tests_all_tests", RUN_ID, JIRA_URL, JIRA_PROJECT_KEY, run_specific_label)
 
-    for screen_safe_name, screen_id, screen_raw_name in screens:
-        logger.info(f"🖥️ Processing screen: «{screen_raw_name}» (ID: {screen_id})")
-        
-        png_screen_path = _download_png(figma_client, FILE_KEY, screen_id, screen_safe_name, FIGMA_SCALE)
-        if not png_screen_path:
-            logger.warning(f"⚠️ Skipping screen «{screen_raw_name}» due to PNG download failure.")
-            continue
+    if OPERATIONAL_MODE == "JIRA_EXPORT" and JIRA_PREFLIGHT_ENABLED:
+        # createmeta is read with a sync client, also in async mode
+        preflight_client = jira_client if isinstance(jira_client, JiraClient) else JiraClient(
+            base_url=JIRA_URL, username=JIRA_USERNAME, password=JIRA_PASSWORD)
+        if not _preflight_jira(preflight_client, common_labels_list):
+            return False
 
-        if OPERATIONAL_MODE == "JIRA_EXPORT":
-            if jira_client: # Ensure jira_client is initialized
-                key_screen = _create_screen_test_issue(jira_client, screen_raw_name, screen_id, png_screen_path)
-                if key_screen:
-                    created_issues_keys.append(key_screen)
-                else:
-                    logger.error(f"❌ Failed to create Jira issue for screen «{screen_raw_name}».")
-        elif OPERATIONAL_MODE == "FILE_EXPORT":
-            base_test_case_id = f"{screen_safe_name}_layout"
-            if TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE:
-                test_case_id = f"{TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE}_{base_test_case_id}"
-            else:
-                test_case_id = base_test_case_id
-            summary = f"{screen_raw_name} - компоновка"
-            figma_link = f"{FIGMA_FILE_URL}&node-id={screen_id}"
-            description = f"*Figma:* [{screen_raw_name}|{figma_link}]"
-            priority = TEXT_EXPORT_DEFAULT_PRIORITY
-            labels_str = ",".join(common_labels_list)
-            action = summary # Per plan, action is same as summary for XRay steps
-            data_field = ""
-            expected_result = f"!{png_screen_path.name}|width=600!" # PNGs are in OUT_DIR
-            board = TEXT_EXPORT_DEFAULT_BOARD
-            
-            test_repo_path_val_file = screen_raw_name
-            test_case_type_val_file = "component"
-            
-            txt_export_data.append([
-                test_case_id, summary, description, priority, labels_str,
-                action, data_field, expected_result, board,
-                test_repo_path_val_file, test_case_type_val_file
-            ])
-        
-        elements = _collect_elements(figma_client, FILE_KEY, screen_id)
-        if not elements:
-            logger.info(f"  ℹ️ └─ No elements found for screen «{screen_raw_name}» matching filters.")
-            continue
-        logger.info(f"  🔍 Found {len(elements)} element(s) for screen «{screen_raw_name}».")
+    # FILE_EXPORT rows are streamed to <export file>.part while test cases are produced
+    exporter = _create_exporter(run_specific_label) if OPERATIONAL_MODE == "FILE_EXPORT" else None
 
-        for elem_safe_name, elem_id, elem_raw_name in elements:
-            logger.info(f"  ✨ Processing element: «{elem_raw_name}» (ID: {elem_id}) on screen «{screen_raw_name}»")
-            
-            # Create a unique name for the element PNG to avoid overwrites if multiple elements have same sanitized name
-            element_png_name = f"{screen_safe_name}__{elem_safe_name}"
-            png_elem_path = _download_png(
-                figma_client, FILE_KEY, elem_id, element_png_name, FIGMA_SCALE
-            )
-            if not png_elem_path:
-                logger.warning(f"    ⚠️ Skipping element «{elem_raw_name}» due to PNG download failure.")
-                continue
-            
-            if OPERATIONAL_MODE == "JIRA_EXPORT":
-                if jira_client: # Ensure jira_client is initialized
-                    key_elem = _create_element_test_issue(
-                        jira_client, screen_raw_name, elem_raw_name, elem_id, png_elem_path
-                    )
-                    if key_elem:
-                        created_issues_keys.append(key_elem)
-                    else:
-                        logger.error(f"    ❌ Failed to create Jira issue for element «{elem_raw_name}» on screen «{screen_raw_name}».")
-            elif OPERATIONAL_MODE == "FILE_EXPORT":
-                base_test_case_id = f"{screen_safe_name}__{elem_safe_name}_logic"
-                if TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE:
-                    test_case_id = f"{TEXT_EXPORT_TESTCASEIDENTIFIER_TEMPLATE}_{base_test_case_id}"
-                else:
-                    test_case_id = base_test_case_id
-                summary = f"{screen_raw_name}. {elem_raw_name} - логика работы"
-                figma_link = f"{FIGMA_FILE_URL}&node-id={elem_id}"
-                description = f"*Figma:* [{elem_raw_name}|{figma_link}]"
-                priority = TEXT_EXPORT_DEFAULT_PRIORITY
-                labels_str = ",".join(common_labels_list)
-                action = summary # Per plan
-                data_field = ""
-                expected_result = f"!{png_elem_path.name}|width=600!" # PNGs are in OUT_DIR
-                board = TEXT_EXPORT_DEFAULT_BOARD
-
-                test_repo_path_val_file = f"{screen_raw_name}/{elem_raw_name}"
-                test_case_type_val_file = "component"
-
-                txt_export_data.append([
-                    test_case_id, summary, description, priority, labels_str,
-                    action, data_field, expected_result, board,
-                    test_repo_path_val_file, test_case_type_val_file
-                ])
+    render_policy = RenderPolicy(FIGMA_SCALE, FIGMA_MAX_PIXELS, FIGMA_MIN_SCALE, FIGMA_MAX_SCALE)
+    with exporter or contextlib.nullcontext():
+        if run_async:
+            issue_records = asyncio.run(_generate_async(figma_client, jira_client, render_policy, common_labels_list, exporter))
+        elif PIPELINE_ENABLED:
+            issue_records = _generate_pipelined(figma_client, jira_client, render_policy, common_labels_list, exporter, screen_cache)
+        else:
+            issue_records = _generate(figma_client, jira_client, render_policy, common_labels_list, exporter, screen_cache)
+    if issue_records is None:
+        if exporter:
+            exporter.abort()
+        return False
 
     # --- Finalizing based on OPERATIONAL_MODE ---
     logger.info("🏁 --- Process Completed ---")
+    logger.info(f"🖼️ Rendering: {render_policy.summary()}")
+    transfer_summary = f"{(figma_client.bytes_downloaded - downloaded_before) / 1024:.1f} KiB of images downloaded"
+    if jira_client:
+        transfer_summary += f", {(jira_client.bytes_uploaded - uploaded_before) / 1024:.1f} KiB of attachments uploaded to Jira"
+    logger.info(f"📦 Transfer: {transfer_summary}")
+    complete = render_policy.failed_count == 0
+    if not complete:
+        logger.warning(f"⚠️ {render_policy.failed_count} node(s) could not be rendered, so this run is incomplete.")
     if OPERATIONAL_MODE == "JIRA_EXPORT":
-        if created_issues_keys:
-            jql = "issuekey in (" + ", ".join(f'"{key}"' for key in created_issues_keys) + ")"
-            encoded_jql = urllib.parse.quote(jql, safe='(),') # Encode JQL
-            jira_link = f"{JIRA_URL.rstrip('/')}/issues/?jql={encoded_jql}"
-            
-            link_file_path = OUT_DIR / f"jira_issues_run_{RUN_ID}.txt"
-            try:
-                with open(link_file_path, "w", encoding="utf-8") as f:
-                    f.write(jira_link)
-                logger.info(f"🔗 Jira link saved to: {link_file_path.resolve()}")
-            except IOError as e:
-                logger.error(f"❌ Failed to write Jira link to file {link_file_path}: {e}")
-
-            logger.info("🔗 Link to created Jira issues:")
-            logger.info(jira_link)
-        else:
-            logger.info("ℹ️ No Jira issues were created in this run.")
+        for record in issue_records:
+            manifest.add(record)
+        _write_run_results(manifest)
+        return complete and all(record.key for record in issue_records)
     elif OPERATIONAL_MODE == "FILE_EXPORT":
-        if txt_export_data:
-            filename = TEXT_EXPORT_FILENAME_TEMPLATE.format(RUN_ID=RUN_ID)
-            output_dir = pathlib.Path(TEXT_EXPORT_PATH)
-            output_dir.mkdir(parents=True, exist_ok=True) # Ensure directory exists
-            file_path = output_dir / filename
-            
-            try:
-                with open(file_path, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f, delimiter=TEXT_EXPORT_CSV_DELIMITER)
-                    writer.writerow(txt_export_header)
-                    writer.writerows(txt_export_data)
-                logger.success(f"✅ Successfully generated TXT file: {file_path.resolve()}")
-                logger.info(f"📄 TXT file contains {len(txt_export_data)} test cases.")
-            except IOError as e:
-                logger.error(f"❌ Failed to write TXT file to {file_path}: {e}")
+        tests_source = None
+        exported = False
+        content_hash = exporter.finish()
+        if exporter.rows_written:
+            file_path = exporter.path
+            # The run label is masked in the content hash, so reruns of an unchanged design are detected
+            export_inputs = {"rows": content_hash, "format": TEXT_EXPORT_FORMAT}
+            build_cache = BuildCache(BUILD_CACHE_PATH)
+            if not force and build_cache.is_fresh(file_path, export_inputs):
+                exporter.abort()
+                exported = True
+                logger.info(f"ℹ️ Test cases are unchanged since the last export, {file_path.resolve()} is left untouched.")
+            else:
+                try:
+                    exporter.commit()
+                except IOError as e:
+                    exporter.abort()
+                    logger.error(f"❌ Failed to write export file to {file_path}: {e}")
+                    logger.error("❌ The final prompt is not built, since the export of this run was not saved.")
+                    return False
+                exported = True
+                build_cache.record(file_path, export_inputs)
+                logger.success(f"✅ Successfully generated {TEXT_EXPORT_FORMAT} export: {file_path.resolve()}")
+                logger.info(f"📄 Export contains {exporter.rows_written} test cases.")
+            tests_source = exporter.csv_copy()
         else:
+            exporter.abort()
             logger.info("ℹ️ No test data was generated for the TXT file in this run.")
 
-        # --- Added logic to run secondary script and open its output ---
-        logger.info(f"⚙️ Proceeding to run secondary script for FILE_EXPORT mode...")
-        
-        secondary_script_relative_path = "create_final_tests/create_final_promt.py"
-        # Assuming send_figma_tests_all_tests.py runs from workspace root
-        secondary_script_full_path = pathlib.Path(secondary_script_relative_path)
-        secondary_script_dir = secondary_script_full_path.parent
-
-        # Define the expected generated file path using TEXT_EXPORT_PATH
-        # TEXT_EXPORT_PATH defaults to "create_final_tests/artifacts"
-        generated_file_to_open = pathlib.Path(TEXT_EXPORT_PATH) / "final_promt.txt"
-
+        # --- Build the final prompt in-process from the rows collected above ---
+        logger.info("⚙️ Building final prompt from artifacts...")
+        overrides = {TESTS_FROM_FIGMA_ARTIFACT: tests_source} if tests_source is not None else None
         try:
-            if not secondary_script_full_path.is_file():
-                logger.error(f"❌ Secondary script {secondary_script_full_path} not found. Skipping execution.")
-            else:
-                logger.info(f"🐍 Executing Python script: python3 {secondary_script_full_path.name} (from {secondary_script_dir})")
-                
-                # Prepare environment variables for the secondary script
-                script_env = os.environ.copy()
-                script_env["FIGMA_RUN_ID"] = RUN_ID
-                script_env["FIGMA_TEXT_EXPORT_PATH"] = TEXT_EXPORT_PATH # TEXT_EXPORT_PATH is relative to workspace root
-
-                result = subprocess.run(
-                    ["python3", secondary_script_full_path.name], # Run script by name, from its directory
-                    capture_output=True, 
-                    text=True, 
-                    check=False, # Manually check returncode to log details
-                    cwd=secondary_script_dir, # Run from the script's own directory
-                    env=script_env
-                )
-
-                if result.stdout:
-                    logger.info(f"Output from {secondary_script_full_path.name}:\n{result.stdout}")
-                if result.stderr: # Log stderr as warning as it might contain non-fatal errors or verbose logs
-                    logger.warning(f"Stderr from {secondary_script_full_path.name}:\n{result.stderr}")
-
-                if result.returncode == 0:
-                    logger.success(f"✅ Successfully executed {secondary_script_full_path.name}.")
-                    
-                    # Attempt to open the generated file
-                    if generated_file_to_open.exists():
-                        logger.info(f"📂 Attempting to open generated file: {generated_file_to_open.resolve()}")
-                        try:
-                            # For macOS (user's OS is darwin), 'open' command.
-                            subprocess.run(["open", str(generated_file_to_open.resolve())], check=True)
-                            logger.success(f"✅ Successfully requested to open {generated_file_to_open.resolve()}.")
-                        except subprocess.CalledProcessError as e_open:
-                            logger.error(f"❌ Failed to open {generated_file_to_open.resolve()}: {e_open}")
-                        except FileNotFoundError: # If 'open' command itself is not found
-                            logger.error(f"❌ 'open' command not found. Cannot open {generated_file_to_open.resolve()}.")
-                    else:
-                        logger.error(f"❌ Expected generated file {generated_file_to_open.resolve()} not found after running {secondary_script_full_path.name}.")
-                else:
-                    logger.error(f"❌ Failed to execute {secondary_script_full_path.name}. Return code: {result.returncode}.")
-
-        except FileNotFoundError: # This handles if python3 or the script itself (if full path used in Popen) is not found
-            logger.error(f"❌ Script {secondary_script_full_path} or python3 interpreter not found. Please ensure it exists and python3 is in PATH.")
-        except Exception as e_script_run_exc: 
-            logger.error(f"❌ An unexpected error occurred while trying to run {secondary_script_full_path.name} or open its file: {e_script_run_exc}")
-        # --- End of added logic ---
+            prompt_path = generate_prompt(overrides=overrides, force=force)
+            logger.success(f"✅ Final prompt is ready: {pathlib.Path(prompt_path).resolve()}")
+        except PromptBuildError as e:
+            logger.error(f"❌ Failed to build final prompt: {e}")
+            return False
+        return complete and exported
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate test cases from Figma screens.")
+    parser.add_argument("--force", action="store_true",
+                        help="Rewrite the TXT export and the final prompt even if their inputs did not change.")
+    main(force=parser.parse_args().force)
@@ -4,7 +4,7 @@ import csv
 import pathlib
 import sys
 import logging # For type hinting
-import urllib.parse # Added for JQL link generation
+import time
 import uuid # Add this import
 import json # Added for parsing ManualTestSteps
 
@@ -19,7 +19,10 @@ except ImportError:
     )
     sys.exit(1)
 
-from jira_client import JiraClient # Assuming jira_client.py is in the same directory or PYTHONPATH
+from jira_client import JiraClient, build_issue_fields # Assuming jira_client.py is in the same directory or PYTHONPATH
+from jira_preflight import preflight
+from run_manifest import IssueRecord, RunManifest
+from http_cassette import cassette_from_config
 from logger_setup import setup_logger # Assuming logger_setup.py is available
 
 # Setup logger for this script
@@ -46,6 +49,16 @@ FINAL_TESTS_FILE_PATH = pathlib.Path("create_final_tests/artifacts/final_tests.t
 CUSTOMFIELD_TEST_REPOSITORY_PATH = getattr(config, "CUSTOMFIELD_TEST_REPOSITORY_PATH", None)
 CUSTOMFIELD_TEST_CASE_TYPE = getattr(config, "CUSTOMFIELD_TEST_CASE_TYPE", None)
 
+# Payloads are validated against Jira createmeta (cached on disk) before any issue is created
+JIRA_PREFLIGHT_ENABLED = getattr(config, "JIRA_PREFLIGHT_ENABLED", True)
+JIRA_CREATEMETA_CACHE_PATH = getattr(config, "JIRA_CREATEMETA_CACHE_PATH", "create_final_tests/artifacts/.cache/jira_createmeta.json")
+JIRA_CREATEMETA_CACHE_TTL = getattr(config, "JIRA_CREATEMETA_CACHE_TTL", 24 * 60 * 60) # Seconds
+
+# Run results: a manifest with keys, source identifiers and timings, and a result link by the run label
+RESULT_MANIFEST_DIR = getattr(config, "RESULT_MANIFEST_DIR", "run_manifests")
+RESULT_KEY_LINKS = getattr(config, "RESULT_KEY_LINKS", False) # Also build issuekey in (...) links, split into chunks
+RESULT_KEYS_PER_LINK = getattr(config, "RESULT_KEYS_PER_LINK", 100)
+
 def check_core_config_settings() -> bool:
     """Validates that essential Jira connection settings are present in config.py."""
     required_configs = [
@@ -105,6 +118,8 @@ def parse_test_cases(file_path: pathlib.Path) -> list[dict]:
 def create_jira_issues_from_final_tests():
     """Main function to read test cases and create Jira issues."""
     logger.info("🚀 Starting script to send final tests to Jira...")
+    manifest = RunManifest("send_final_tests", RUN_ID, getattr(config, "JIRA_URL", ""),
+                           getattr(config, "JIRA_PROJECT_KEY", ""), f"runid_{RUN_ID}")
 
     if not check_core_config_settings():
         logger.error("❌ Halting script due to missing or invalid core Jira configuration.")
@@ -126,7 +141,8 @@ def create_jira_issues_from_final_tests():
     jira_client = JiraClient(
         base_url=config.JIRA_URL,
         username=config.JIRA_USERNAME,
-        password=config.JIRA_PASSWORD
+        password=config.JIRA_PASSWORD,
+        cassette=cassette_from_config(config)
     )
 
     test_cases = parse_test_cases(FINAL_TESTS_FILE_PATH)
@@ -134,9 +150,7 @@ def create_jira_issues_from_final_tests():
         logger.info("❌ No test cases to process. Exiting.")
         return
 
-    created_issue_count = 0
-    failed_issue_count = 0
-    created_issue_keys = [] # To store keys of created issues
+    issue_requests = [] # (identifier from file, create_issue kwargs), built for all rows before anything is sent
 
     for tc_data in test_cases:
         summary = tc_data.get(COL_SUMMARY, "No Summary Provided").strip()
@@ -206,42 +220,68 @@ def create_jira_issues_from_final_tests():
             steps_data = [{"fields": {"Action": "No steps defined", "Data": "", "Expected Result": ""}}]
         # --- End of updated logic for processing ManualTestSteps ---
 
+        issue_requests.append((tc_identifier_from_file, dict(
+            project_key=config.JIRA_PROJECT_KEY,
+            summary=summary,
+            description=description_final,
+            issue_type=config.ISSUE_TYPE,
+            xray_steps_field=config.XRAY_STEPS_FIELD,
+            steps_data=steps_data,
+            labels=final_labels,
+            custom_field_test_repository_path_id=CUSTOMFIELD_TEST_REPOSITORY_PATH,
+            test_repository_path_value=test_repo_path_val,
+            custom_field_test_case_type_id=CUSTOMFIELD_TEST_CASE_TYPE,
+            test_case_type_value=test_case_type_val
+        )))
+
+    if JIRA_PREFLIGHT_ENABLED:
+        logger.info(f"🔎 Validating {len(issue_requests)} issue payload(s) against Jira createmeta...")
+        problems = preflight(
+            jira_client, config.JIRA_PROJECT_KEY, config.ISSUE_TYPE,
+            [(tc_identifier, build_issue_fields(**issue_kwargs)) for tc_identifier, issue_kwargs in issue_requests],
+            JIRA_CREATEMETA_CACHE_PATH, JIRA_CREATEMETA_CACHE_TTL
+        )
+        if problems:
+            logger.error(f"❌ Preflight found {len(problems)} problem(s); no issues were created:")
+            for problem in problems:
+                logger.error(f"   • {problem}")
+            return
+        if problems is not None:
+            logger.info("✅ All payloads passed the preflight check.")
+
+    for tc_identifier_from_file, issue_kwargs in issue_requests:
+        summary = issue_kwargs["summary"]
         logger.info(f"Attempting to create Jira issue for: '{summary}' (ID from file: {tc_identifier_from_file})")
+        started = time.monotonic()
         try:
-            issue = jira_client.create_issue(
-                project_key=config.JIRA_PROJECT_KEY,
-                summary=summary,
-                description=description_final,
-                issue_type=config.ISSUE_TYPE,
-                xray_steps_field=config.XRAY_STEPS_FIELD,
-                steps_data=steps_data,
-                labels=final_labels,
-                custom_field_test_repository_path_id=CUSTOMFIELD_TEST_REPOSITORY_PATH,
-                test_repository_path_value=test_repo_path_val,
-                custom_field_test_case_type_id=CUSTOMFIELD_TEST_CASE_TYPE,
-                test_case_type_value=test_case_type_val
-            )
+            issue = jira_client.create_issue(**issue_kwargs)
             logger.success(f"✅ Successfully created Jira issue {issue.get('key', 'UNKNOWN_KEY')} for: '{summary}'")
-            created_issue_count += 1
-            if issue_key := issue.get('key'): # Store the key if present
-                created_issue_keys.append(issue_key)
+            manifest.add(IssueRecord(tc_identifier_from_file, issue.get('key'), time.monotonic() - started))
         except Exception as e:
             logger.error(f"❌ Failed to create Jira issue for summary '{summary}' (ID: {tc_identifier_from_file}). Error: {e}")
-            failed_issue_count += 1
+            manifest.add(IssueRecord(tc_identifier_from_file, None, time.monotonic() - started))
             
+    created_issue_count = len(manifest.created_keys)
     logger.info("--- Script Finished ---")
     logger.info(f"✅ Successfully created issues: {created_issue_count}")
-    logger.info(f"❌ Failed to create issues: {failed_issue_count}")
+    logger.info(f"❌ Failed to create issues: {len(manifest.records) - created_issue_count}")
+
+    keys_per_link = RESULT_KEYS_PER_LINK if RESULT_KEY_LINKS else None
+    manifest_path = pathlib.Path(RESULT_MANIFEST_DIR) / f"send_final_tests_runid_{RUN_ID}.json"
+    try:
+        manifest.write(manifest_path, keys_per_link)
+        logger.info(f"🧾 Run manifest saved to: {manifest_path.resolve()}")
+    except IOError as e:
+        logger.error(f"❌ Failed to write run manifest to {manifest_path}: {e}")
 
-    if created_issue_keys:
-        jql = "issuekey in (" + ", ".join(f'"{key}"' for key in created_issue_keys) + ")"
-        encoded_jql = urllib.parse.quote(jql, safe='(),')
-        jira_url_base = config.JIRA_URL.rstrip('/')
-        jira_link = f"{jira_url_base}/issues/?jql={encoded_jql}"
+    if created_issue_count:
         logger.info("🔗 Link to created Jira issues:")
-        logger.info(jira_link)
-    elif created_issue_count > 0: # Should not happen if keys were captured correctly
-        logger.warning("Issues were created, but their keys could not be retrieved for the JQL link.")
+        logger.info(manifest.label_link())
+        if keys_per_link:
+            key_links = manifest.key_links(keys_per_link)
+            logger.info(f"🔗 Issue key links ({len(key_links)}, up to {keys_per_link} keys each):")
+            for key_link in key_links:
+                logger.info(key_link)
     else:
         logger.info("No Jira issues were created in this run.")
 
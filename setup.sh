@@ -19,10 +19,14 @@ echo "ℹ️Installing other dependencies..."
 pip3 install requests==2.31
 pip3 install pathlib==1.0.1
 pip3 install urllib3==1.26.17
+pip3 install pyyaml==6.0.1
+pip3 install pillow==10.3.0
+pip3 install "httpx[http2]==0.27.0"
 
 # Make the main script executable
 chmod +x send_figma_tests_all_tests.py
 chmod +x create_final_tests/create_final_promt.py
 chmod +x send_final_tests.py
+chmod +x figma_watch_service.py
 
 echo "✅ Dependencies installed successfully! Scripts send_figma_tests_all_tests.py, create_final_tests/create_final_promt.py, and send_final_tests.py are now executable." 
\ No newline at end of file